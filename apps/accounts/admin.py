@@ -1,10 +1,19 @@
 from django.contrib import admin
+from django.db import models
+
+from apps.main.uploads import ValidatedImageField
+from config.admin_utils import QueryBudgetMixin
 from .models import Profile
 
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(QueryBudgetMixin, admin.ModelAdmin):
     list_display = ['user', 'location', 'birth_date']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
     search_fields = ['user__username', 'location']
     list_filter = ['location']
+    formfield_overrides = {
+        models.ImageField: {'form_class': ValidatedImageField},
+    }
     
\ No newline at end of file
@@ -0,0 +1,61 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+from apps.main import invalidation
+from config.metrics import cache_result
+
+# Скидається в усіх воркерах через покоління invalidation.USERS
+_users = invalidation.local_cache(invalidation.USERS)
+_lock = threading.Lock()
+
+
+def invalidate_user(user_id):
+    """
+    Видаляє користувача з кешу (викликається сигналами User/Profile).
+    Свій процес - одразу, інші - після коміту, через лічильник поколінь.
+    """
+    with _lock:
+        _users.pop(user_id, None)
+    invalidation.bump_on_commit(invalidation.USERS)
+
+
+def clear_user_cache():
+    with _lock:
+        _users.clear()
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, який кешує користувачів у пам'яті процесу на
+    AUTH_USER_CACHE_TIMEOUT секунд.
+
+    AuthenticationMiddleware звертається до get_user() на кожному запиті,
+    тож кеш прибирає SELECT з auth_user. Зміна будь-якого користувача
+    скидає кеш в усіх воркерах (InvalidationMiddleware), тож
+    заблокований чи змінений обліковий запис не живе в інших процесах
+    до кінця таймауту. Кожен запит отримує власну копію
+    об'єкта, щоб кеші прав (_perm_cache) не «протікали» між запитами.
+    """
+
+    def get_user(self, user_id):
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        if timeout <= 0:
+            return super().get_user(user_id)
+
+        now = time.monotonic()
+        entry = _users.get(user_id)
+        if entry and entry[0] > now:
+            cache_result("auth_user", hits=1)
+            return copy.copy(entry[1])
+
+        cache_result("auth_user", misses=1)
+        user = super().get_user(user_id)
+        if user is not None:
+            with _lock:
+                _users[user_id] = (now + timeout, user)
+            user = copy.copy(user)
+        return user
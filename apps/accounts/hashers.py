@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 з кількістю ітерацій з PASSWORD_HASH_ITERATIONS.
+
+    Алгоритм той самий (pbkdf2_sha256), тож наявні хеші перевіряються як
+    і раніше, а після успішного входу перераховуються з новою кількістю
+    ітерацій. Вартість однієї перевірки показує команда auth_benchmark.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
@@ -0,0 +1,83 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from apps.accounts.views import login_views
+
+BENCHMARK_USERNAME = "auth-benchmark-user"
+BENCHMARK_PASSWORD = "benchmark-password-123"
+
+
+class Command(BaseCommand):
+    help = (
+        "Вимірює CPU-вартість автентифікації: один хеш пароля з поточними PASSWORD_HASH_ITERATIONS "
+        "та повний POST входу (успішний, з невірним паролем, заблокований лімітом)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=10, help="Кількість повторів кожного вимірювання")
+        parser.add_argument(
+            "--iterations", type=int, nargs="*", default=[],
+            help="Додатково порівняти кількості ітерацій PBKDF2 (наприклад: 260000 600000 1000000)",
+        )
+
+    def handle(self, *args, **options):
+        rounds = options["rounds"]
+        hasher = get_hasher()
+        self.stdout.write(f"Хешер: {hasher.algorithm}, ітерацій: {getattr(hasher, 'iterations', '-')}")
+        self.stdout.write("")
+        self.stdout.write(f"{'вимірювання':<40}{'CPU ms':>10}{'стін. ms':>10}{'req/s на ядро':>16}")
+        self.stdout.write("-" * 76)
+
+        self.row("хеш пароля", rounds, lambda: hasher.encode(BENCHMARK_PASSWORD, hasher.salt()))
+        for iterations in options["iterations"]:
+            self.row(
+                f"хеш пароля, {iterations} ітерацій", rounds,
+                lambda iterations=iterations: hasher.encode(BENCHMARK_PASSWORD, hasher.salt(), iterations),
+            )
+
+        # Користувач створюється в транзакції, яка відкочується наприкінці
+        with transaction.atomic():
+            User.objects.create_user(BENCHMARK_USERNAME, password=BENCHMARK_PASSWORD)
+            factory = RequestFactory()
+            addresses = (f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}" for n in range(1, 2**24))
+
+            def login(password, ip=None):
+                request = factory.post("/accounts/login/", {"username": BENCHMARK_USERNAME, "password": password})
+                request.META["REMOTE_ADDR"] = ip or next(addresses)
+                request.user = AnonymousUser()
+                SessionMiddleware(lambda r: None).process_request(request)
+                request._messages = FallbackStorage(request)
+                return login_views(request)
+
+            self.row("POST входу, вірний пароль", rounds, lambda: login(BENCHMARK_PASSWORD))
+            # Кожен запит з нової адреси, тож вимірювання не впирається в ліміт невдач
+            self.row("POST входу, невірний пароль", rounds, lambda: login("wrong"))
+
+            # Документаційна адреса 192.0.2.1 вичерпує ліміт; далі відповідь 429 до будь-якого хешування
+            limit = settings.AUTH_THROTTLE_RULES["login"]["ip"][0]
+            for _ in range(limit + 1):
+                login("wrong", ip="192.0.2.1")
+            self.row("POST входу, заблокований лімітом", rounds, lambda: login("wrong", ip="192.0.2.1"))
+
+            transaction.set_rollback(True)
+
+    def row(self, label, rounds, func):
+        cpu, wall = [], []
+        for _ in range(rounds):
+            cpu_started, wall_started = time.process_time(), time.perf_counter()
+            func()
+            cpu.append(time.process_time() - cpu_started)
+            wall.append(time.perf_counter() - wall_started)
+        cpu_ms = statistics.median(cpu) * 1000
+        wall_ms = statistics.median(wall) * 1000
+        per_core = 1000 / cpu_ms if cpu_ms else float("inf")
+        self.stdout.write(f"{label:<40}{cpu_ms:>10.1f}{wall_ms:>10.1f}{per_core:>16.1f}")
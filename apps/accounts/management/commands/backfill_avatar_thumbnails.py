@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from apps.accounts.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Створює мініатюри для аватарів, завантажених до появи avatar_thumbnail. "
+        "Мініатюру генерує той самий сигнал pre_save, що й при завантаженні; повторний запуск безпечний"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Кількість профілів в одній транзакції")
+
+    def handle(self, *args, **options):
+        pending = (
+            Profile.objects.exclude(avatar="").exclude(avatar__isnull=True)
+            .filter(Q(avatar_thumbnail="") | Q(avatar_thumbnail__isnull=True))
+            .order_by("pk")
+        )
+        created = failed = 0
+        last_pk = 0
+
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[:options["batch_size"]])
+            if not batch:
+                break
+            with transaction.atomic():
+                for profile in batch:
+                    try:
+                        profile.save(update_fields=["avatar_thumbnail"])
+                    except OSError as error:
+                        # Файл аватара зник із диска - профіль лишається без мініатюри
+                        self.stderr.write(f"Профіль {profile.pk}: {error}")
+                        failed += 1
+                        continue
+                    if profile.avatar_thumbnail:
+                        created += 1
+                    else:
+                        self.stderr.write(f"Профіль {profile.pk}: {profile.avatar.name} не є зображенням")
+                        failed += 1
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"Створено {created} мініатюр, пропущено {failed}"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-19 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='avatar/thumbs/', verbose_name='Мініатюра аватара'),
+        ),
+    ]
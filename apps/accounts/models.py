@@ -1,14 +1,20 @@
 
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from apps.main.storage import release_on_commit
+
+from .backends import invalidate_user
+from .thumbnails import make_avatar_thumbnail
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True, verbose_name='Про себе')
     avatar = models.ImageField(upload_to='avatar/', blank=True, null=True, verbose_name='Аватар')
+    avatar_thumbnail = models.ImageField(upload_to='avatar/thumbs/', blank=True, null=True, editable=False, verbose_name='Мініатюра аватара')
     birth_date = models.DateField(null=True, blank=True, verbose_name="Дата народження")
     location = models.CharField(max_length=50, blank=True, verbose_name='Місто')
     website = models.URLField(blank=True, verbose_name='Веб сайт')
@@ -20,3 +26,62 @@ class Profile(models.Model):
     def __str__(self):
         return f"Профіль {self.user.username}"
 
+    @property
+    def avatar_url(self):
+        """URL мініатюри аватара (оригінал на сторінках не віддається)"""
+        if self.avatar_thumbnail:
+            return self.avatar_thumbnail.url
+        return None
+
+
+@receiver(post_save, sender=User)
+def create_user_profile(sender, instance, created, **kwargs):
+    """Створює профіль для нового користувача"""
+    if created:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Profile)
+def update_avatar_thumbnail(sender, instance, **kwargs):
+    """Генерує мініатюру аватара при його зміні"""
+    old_avatar = old_thumbnail = None
+    if instance.pk:
+        old_avatar, old_thumbnail = Profile.objects.filter(pk=instance.pk).values_list(
+            'avatar', 'avatar_thumbnail'
+        ).first() or (None, None)
+    # Старі файли можуть бути спільними, тож звільняються лише після збереження
+    instance._previous_files = (old_avatar, old_thumbnail)
+
+    new_avatar = instance.avatar.name if instance.avatar else None
+    if old_avatar == new_avatar and (instance.avatar_thumbnail or not instance.avatar):
+        return
+
+    instance.avatar_thumbnail = None
+    if instance.avatar:
+        thumbnail = make_avatar_thumbnail(instance.avatar)
+        if thumbnail:
+            instance.avatar_thumbnail.save(*thumbnail, save=False)
+
+
+@receiver(post_save, sender=Profile)
+def release_replaced_avatar(sender, instance, **kwargs):
+    """Звільняє замінені аватар і мініатюру, якщо на них більше ніхто не посилається"""
+    current = {instance.avatar.name, instance.avatar_thumbnail.name}
+    previous = getattr(instance, '_previous_files', ())
+    release_on_commit(*(name for name in previous if name and name not in current))
+
+
+@receiver(post_delete, sender=Profile)
+def release_avatar_files(sender, instance, **kwargs):
+    release_on_commit(instance.avatar.name, instance.avatar_thumbnail.name)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Скидає кешованого користувача після зміни (пароль, права, is_active...)"""
+    invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def invalidate_cached_profile_user(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
@@ -1,3 +1,143 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.main import invalidation
+from config.middleware import client_ip
+
+from PIL import Image
+
+from .backends import CachedModelBackend, _users
+from .models import Profile
+
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+LOGIN_RULES = {"login": {"ip": (20, 300), "username": (3, 300)}}
+
+
+class ClientIpTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_remote_addr_without_proxies(self):
+        request = self.factory.get("/", REMOTE_ADDR="203.0.113.5", HTTP_X_FORWARDED_FOR="198.51.100.1")
+        self.assertEqual(client_ip(request), "203.0.113.5")
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_forwarded_address_behind_proxy(self):
+        # Ліва частина заголовка - від клієнта, її можна підробити
+        request = self.factory.get("/", REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="127.0.0.1, 198.51.100.7")
+        self.assertEqual(client_ip(request), "198.51.100.7")
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_forwarded_address_behind_two_proxies(self):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.2", HTTP_X_FORWARDED_FOR="198.51.100.7, 10.0.0.1")
+        self.assertEqual(client_ip(request), "198.51.100.7")
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_request_bypassing_proxy(self):
+        request = self.factory.get("/", REMOTE_ADDR="203.0.113.5")
+        self.assertEqual(client_ip(request), "203.0.113.5")
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUTH_THROTTLE_RULES=LOGIN_RULES, TRUSTED_PROXY_COUNT=1)
+class LoginThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        User.objects.create_user("admin", password="correct-password")
+
+    def login(self, password, ip):
+        return self.client.post(
+            reverse("accounts:login"), {"username": "admin", "password": password},
+            REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR=ip,
+        )
+
+    def test_failures_lock_username_for_that_address(self):
+        for _ in range(4):
+            self.login("wrong", "198.51.100.1")
+        response = self.login("correct-password", "198.51.100.1")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_failures_from_other_address_do_not_lock_owner(self):
+        for _ in range(10):
+            self.login("wrong", "198.51.100.1")
+        response = self.login("correct-password", "203.0.113.9")
+        self.assertRedirects(response, reverse("main:post_list"), fetch_redirect_response=False)
+
+    def test_clients_behind_proxy_are_counted_separately(self):
+        # Усі запити приходять з 127.0.0.1 (проксі), але ліміт за IP рахується для кожного клієнта
+        for index in range(25):
+            self.assertEqual(self.login("wrong", f"198.51.100.{index}").status_code, 200)
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=300)
+class CachedUserTests(TestCase):
+    def setUp(self):
+        _users.clear()
+        self.addCleanup(_users.clear)
+        self.user = User.objects.create_user("reader")
+        self.backend = CachedModelBackend()
+
+    def test_user_is_cached(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_change_bumps_generation_for_other_workers(self):
+        self.backend.get_user(self.user.pk)
+        before = invalidation.generation(invalidation.USERS)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(invalidation.generation(invalidation.USERS), before + 1)
+
+    def test_generation_bump_clears_cache(self):
+        # Інший воркер змінив користувача: у цьому процесі сигнал не спрацював
+        self.backend.get_user(self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        invalidation.bump(invalidation.USERS)
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+
+class BackfillAvatarThumbnailsTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def profile_with_avatar(self, username, content):
+        profile = User.objects.create_user(username).profile
+        profile.avatar.save(f"{username}.png", ContentFile(content), save=False)
+        # Як до появи мініатюр: аватар є, мініатюри немає
+        Profile.objects.filter(pk=profile.pk).update(avatar=profile.avatar.name, avatar_thumbnail="")
+        return profile
+
+    def test_creates_missing_thumbnails(self):
+        image = BytesIO()
+        Image.new("RGB", (400, 300), "teal").save(image, format="PNG")
+        profile = self.profile_with_avatar("reader", image.getvalue())
+        broken = self.profile_with_avatar("broken", b"not an image")
+
+        stdout, stderr = StringIO(), StringIO()
+        call_command("backfill_avatar_thumbnails", stdout=stdout, stderr=stderr)
+
+        profile.refresh_from_db()
+        self.assertTrue(profile.avatar_thumbnail.name.endswith(".webp"))
+        with Image.open(profile.avatar_thumbnail.path) as thumbnail:
+            self.assertEqual(thumbnail.size, (160, 160))
+        broken.refresh_from_db()
+        self.assertFalse(broken.avatar_thumbnail)
+        self.assertIn(f"Профіль {broken.pk}", stderr.getvalue())
+
+        call_command("backfill_avatar_thumbnails", stdout=stdout, stderr=StringIO())
+        self.assertIn("Створено 0 мініатюр", stdout.getvalue())
@@ -0,0 +1,139 @@
+"""
+Обмеження спроб входу та реєстрації.
+
+Кожна перевірка пароля - це PBKDF2 з сотнями тисяч ітерацій, тож хвиля
+підбору паролів займає всі процесори воркерів. check() викликається до
+будь-якого хешування: рахує спробу в ковзному вікні для IP і перевіряє
+активні блокування IP та пари (ім'я користувача, IP). Невдалі входи
+рахуються для пари (failure()): підбір пароля до облікового запису
+з однієї адреси зупиняється, але сам обліковий запис не блокується -
+інакше будь-хто міг би заблокувати чужий вхід, зокрема адміністратора.
+
+Ковзне вікно апроксимується двома сусідніми інтервалами в кеші
+(поточний + зважений попередній). Перевищення ліміту дає блокування,
+тривалість якого подвоюється з кожним повтором протягом
+AUTH_LOCKOUT_STRIKE_TTL. Ліміти спільні для воркерів, лише якщо
+спільний бекенд кешу (з LocMemCache - в межах процесу).
+"""
+import hashlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from config import metrics
+from config.middleware import client_ip
+
+logger = logging.getLogger(__name__)
+
+IP = "ip"
+USERNAME = "username"
+
+
+def _ident(*parts):
+    # Ім'я користувача нормалізується й хешується: довільні символи не потрапляють у ключ кешу
+    return hashlib.sha1("\0".join(part.strip().lower() for part in parts).encode()).hexdigest()
+
+
+def _key(scope, kind, ident, suffix):
+    return f"auth_throttle:{scope}:{kind}:{ident}:{suffix}"
+
+
+def _hit(scope, kind, ident, window):
+    """Рахує подію і повертає зважену кількість подій за останні window секунд"""
+    now = time.time()
+    bucket = int(now // window)
+    current_key = _key(scope, kind, ident, bucket)
+
+    if cache.add(current_key, 1, timeout=window * 2):
+        current = 1
+    else:
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, timeout=window * 2)
+            current = 1
+    previous = cache.get(_key(scope, kind, ident, bucket - 1), 0)
+
+    elapsed = (now % window) / window
+    return previous * (1 - elapsed) + current
+
+
+def _lock(scope, kind, ident):
+    """Блокує ключ; кожне повторне блокування вдвічі довше за попереднє"""
+    strikes_key = _key(scope, kind, ident, "strikes")
+    if cache.add(strikes_key, 1, timeout=settings.AUTH_LOCKOUT_STRIKE_TTL):
+        strikes = 1
+    else:
+        try:
+            strikes = cache.incr(strikes_key)
+        except ValueError:
+            strikes = 1
+    duration = min(settings.AUTH_LOCKOUT_BASE * 2 ** (strikes - 1), settings.AUTH_LOCKOUT_MAX)
+    cache.set(_key(scope, kind, ident, "lock"), time.time() + duration, timeout=duration)
+
+    metrics.inc("auth_lockouts_total", scope=scope, kind=kind)
+    logger.warning("Блокування %s/%s на %d s (повтор %d)", scope, kind, duration, strikes)
+    return duration
+
+
+def _rule(scope, kind):
+    return settings.AUTH_THROTTLE_RULES.get(scope, {}).get(kind)
+
+
+def check(scope, request, username=None):
+    """
+    Рахує спробу і повертає, скільки секунд чекати (0 - можна продовжувати).
+    Викликається до валідації форми, тобто до хешування пароля.
+    """
+    ip = client_ip(request)
+    idents = {IP: _ident(ip)}
+    if username:
+        idents[USERNAME] = _ident(username, ip)
+
+    locks = cache.get_many([_key(scope, kind, ident, "lock") for kind, ident in idents.items()])
+    if locks:
+        metrics.inc("auth_throttled_total", scope=scope)
+        return max(1, math.ceil(max(locks.values()) - time.time()))
+
+    rule = _rule(scope, IP)
+    if rule:
+        limit, window = rule
+        if _hit(scope, IP, idents[IP], window) > limit:
+            metrics.inc("auth_throttled_total", scope=scope)
+            return _lock(scope, IP, idents[IP])
+    return 0
+
+
+def failure(scope, request, username):
+    """Невдала спроба для імені з адреси клієнта; при перевищенні ліміту пара блокується"""
+    rule = _rule(scope, USERNAME)
+    if not (rule and username):
+        return
+    limit, window = rule
+    ident = _ident(username, client_ip(request))
+    if _hit(scope, USERNAME, ident, window) > limit:
+        _lock(scope, USERNAME, ident)
+
+
+def success(scope, request, username):
+    """Успішний вхід скидає лічильник невдач для імені з цієї адреси (але не для IP)"""
+    rule = _rule(scope, USERNAME)
+    if not (rule and username):
+        return
+    ident = _ident(username, client_ip(request))
+    bucket = int(time.time() // rule[1])
+    cache.delete_many([_key(scope, USERNAME, ident, bucket), _key(scope, USERNAME, ident, bucket - 1)])
+
+
+def throttled_response(request, template_name, context, retry_after):
+    minutes = max(1, math.ceil(retry_after / 60))
+    response = render(request, template_name, {
+        **context,
+        "throttle_message": f"Забагато спроб. Спробуйте ще раз через {minutes} хв.",
+    }, status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
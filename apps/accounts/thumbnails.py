@@ -0,0 +1,30 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+AVATAR_THUMBNAIL_SIZE = (160, 160)
+
+
+def make_avatar_thumbnail(image_file):
+    """
+    Створює квадратну мініатюру аватара фіксованого розміру у форматі WebP.
+
+    Повертає (ім'я файлу, ContentFile) або None, якщо файл не є зображенням.
+    """
+    image_file.seek(0)
+    try:
+        with Image.open(image_file) as image:
+            image.draft("RGB", AVATAR_THUMBNAIL_SIZE)
+            image = ImageOps.exif_transpose(image)
+            thumbnail = ImageOps.fit(image.convert("RGB"), AVATAR_THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    except (OSError, ValueError):
+        return None
+    finally:
+        image_file.seek(0)
+
+    buffer = BytesIO()
+    thumbnail.save(buffer, format="WEBP", quality=85)
+    base = os.path.splitext(os.path.basename(image_file.name))[0]
+    return f"{base}_{AVATAR_THUMBNAIL_SIZE[0]}.webp", ContentFile(buffer.getvalue())
@@ -2,25 +2,64 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-from apps.main.models import Category
+from apps.main.models import ArchivedComment, Category, Comment, Post
+from . import throttling
+from .models import Profile
+
+
+def _count_by_author(model):
+    """Підзапит з кількістю об'єктів моделі для користувача"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(author=OuterRef('pk'))
+            .order_by()
+            .values('author')
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
 
 def login_views(request):
     if request.user.is_authenticated:
         return redirect("main:post_list")
 
-    form = AuthenticationForm(request, data=request.POST or None)
+    if request.method != 'POST':
+        return render(request, 'accounts/login.html', {"form": AuthenticationForm(request)})
 
-    if request.method == 'POST' and form.is_valid():
+    # Ліміти перевіряються до валідації форми, тобто до хешування пароля
+    username = request.POST.get('username', '')
+    retry_after = throttling.check('login', request, username)
+    if retry_after:
+        return throttling.throttled_response(
+            request, 'accounts/login.html', {"form": AuthenticationForm(request, initial={'username': username})}, retry_after,
+        )
+
+    form = AuthenticationForm(request, data=request.POST)
+    if form.is_valid():
+        throttling.success('login', request, username)
         login(request, form.get_user())
         return redirect("main:post_list")
 
+    throttling.failure('login', request, username)
     return render(request, 'accounts/login.html', {"form": form})
 
 def register_view(request):
     if request.user.is_authenticated:
         return redirect("main:post_list")
     
+    if request.method == 'POST':
+        retry_after = throttling.check('register', request)
+        if retry_after:
+            return throttling.throttled_response(
+                request, 'accounts/register.html', {"form": UserCreationForm()}, retry_after,
+            )
+
     form = UserCreationForm(request.POST or None)
 
     if request.method == 'POST' and form.is_valid():
@@ -36,4 +75,21 @@ def logout_view(request):
 
 @login_required
 def profile_view(request):
-    return render(request, "accounts/profile.html")
\ No newline at end of file
+    # Профіль і лічильники постів/коментарів - одним запитом
+    profile_user = (
+        User.objects.select_related('profile')
+        .annotate(
+            posts_count=_count_by_author(Post),
+            comments_count=_count_by_author(Comment) + _count_by_author(ArchivedComment),
+        )
+        .get(pk=request.user.pk)
+    )
+    try:
+        profile = profile_user.profile
+    except Profile.DoesNotExist:
+        profile, _ = Profile.objects.get_or_create(user=profile_user)
+
+    return render(request, "accounts/profile.html", {
+        "profile_user": profile_user,
+        "profile": profile,
+    })
\ No newline at end of file
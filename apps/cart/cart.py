@@ -0,0 +1,55 @@
+from django.conf import settings
+
+from apps.main.models import Post
+
+
+class Cart:
+    """
+    Список для читання, що зберігається в сесії як {"<post_id>": кількість}.
+
+    Окремих рядків у БД немає: кількість елементів рахується з сесії,
+    а пости для відображення підтягуються одним in_bulk().
+    """
+
+    def __init__(self, request):
+        self.session = request.session
+        self.items = self.session.get(settings.CART_SESSION_ID) or {}
+
+    def __len__(self):
+        return sum(self.items.values())
+
+    def __contains__(self, post_id):
+        return str(post_id) in self.items
+
+    def quantity(self, post_id):
+        return self.items.get(str(post_id), 0)
+
+    def add(self, post_id, quantity=1, override=False):
+        key = str(post_id)
+        if key not in self.items and len(self.items) >= settings.CART_MAX_ITEMS:
+            return False
+        current = 0 if override else self.items.get(key, 0)
+        self.items[key] = max(1, min(current + quantity, settings.CART_MAX_QUANTITY))
+        self.save()
+        return True
+
+    def remove(self, post_id):
+        if self.items.pop(str(post_id), None) is not None:
+            self.save()
+
+    def clear(self):
+        self.items = {}
+        self.session.pop(settings.CART_SESSION_ID, None)
+
+    def save(self):
+        self.session[settings.CART_SESSION_ID] = self.items
+        self.session.modified = True
+
+    def entries(self):
+        """Пости з кількістю в порядку додавання; видалені пости пропускаються"""
+        posts = Post.objects.select_related("category").in_bulk([int(key) for key in self.items])
+        return [
+            {"post": posts[int(key)], "quantity": quantity}
+            for key, quantity in self.items.items()
+            if int(key) in posts
+        ]
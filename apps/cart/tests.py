@@ -1,3 +1,66 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from apps.main.models import Post
+from .views import COUNT_COOKIE
+
+CACHED_MIDDLEWARE = [
+    'django.middleware.cache.UpdateCacheMiddleware',
+    *settings.MIDDLEWARE,
+    'django.middleware.cache.FetchFromCacheMiddleware',
+]
+
+
+class SharedPagesTests(TestCase):
+    """Анонімні сторінки не видають cookie, тож per-site кеш може їх зберігати"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.post = Post.objects.create(
+            title="Пост", slug="post", content="...", author=User.objects.create_user("author"),
+        )
+
+    def test_anonymous_pages_set_no_cookies(self):
+        for url in (reverse("main:post_list"), self.post.get_absolute_url()):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.cookies, url)
+            self.assertNotContains(response, "csrfmiddlewaretoken")
+
+    @override_settings(MIDDLEWARE=CACHED_MIDDLEWARE, CACHE_MIDDLEWARE_SECONDS=60)
+    def test_anonymous_list_is_served_from_cache(self):
+        url = reverse("main:post_list")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0)
+
+
+class CartStateTests(TestCase):
+    def setUp(self):
+        self.post = Post.objects.create(
+            title="Пост", slug="post", content="...", author=User.objects.create_user("author"),
+        )
+
+    def test_state_issues_csrf_cookie_and_lists_items(self):
+        response = self.client.get(reverse("cart:cart_state"))
+        self.assertEqual(response.json(), {"count": 0, "items": []})
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+        self.client.post(reverse("cart:cart_add", args=[self.post.id]))
+        response = self.client.get(reverse("cart:cart_state"))
+        self.assertEqual(response.json(), {"count": 1, "items": [self.post.id]})
+
+    def test_count_cookie_follows_cart(self):
+        response = self.client.post(reverse("cart:cart_add", args=[self.post.id]), {"quantity": 2})
+        self.assertEqual(response.cookies[COUNT_COOKIE].value, "2")
+        response = self.client.post(reverse("cart:cart_remove", args=[self.post.id]))
+        self.assertEqual(response.cookies[COUNT_COOKIE].value, "")
+        self.assertEqual(response.cookies[COUNT_COOKIE]["max-age"], 0)
@@ -1,3 +1,70 @@
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_GET, require_POST
 
-# Create your views here.
+from apps.main.models import Post
+from .cart import Cart
+
+# Cookie з кількістю елементів для лічильника в шапці (читає JS у base.html)
+COUNT_COOKIE = 'reading_list'
+
+
+def cart_detail(request):
+    """Сторінка списку для читання"""
+    cart = Cart(request)
+    return _with_count_cookie(
+        render(request, 'cart/detail.html', {'entries': cart.entries()}), cart,
+    )
+
+
+@never_cache
+@ensure_csrf_cookie
+@require_GET
+def cart_state(request):
+    """
+    Стан списку для JS: кількість і id постів. Заодно видає cookie csrftoken -
+    спільні сторінки його не містять, щоб лишатися кешованими.
+    """
+    cart = Cart(request)
+    return _with_count_cookie(
+        JsonResponse({'count': len(cart), 'items': [int(key) for key in cart.items]}), cart,
+    )
+
+
+def _with_count_cookie(response, cart):
+    """
+    Кількість у cookie, доступному JS: лічильник у шапці береться звідти,
+    а сторінки не читають сесію і не отримують Vary: Cookie через список.
+    """
+    if len(cart):
+        response.set_cookie(COUNT_COOKIE, str(len(cart)), samesite='Lax')
+    else:
+        response.delete_cookie(COUNT_COOKIE, samesite='Lax')
+    return response
+
+
+@require_POST
+def cart_add(request, post_id):
+    """Додає пост до списку; відповідає JSON, сторінка не перезавантажується"""
+    if not Post.objects.filter(pk=post_id).exists():
+        return JsonResponse({'error': 'Пост не знайдено'}, status=404)
+
+    try:
+        quantity = int(request.POST.get('quantity', 1))
+    except ValueError:
+        return JsonResponse({'error': 'Некоректна кількість'}, status=400)
+
+    cart = Cart(request)
+    if not cart.add(post_id, quantity, override=request.POST.get('override') == '1'):
+        return JsonResponse({'error': 'Список для читання заповнений'}, status=400)
+    return _with_count_cookie(JsonResponse({'count': len(cart), 'quantity': cart.quantity(post_id)}), cart)
+
+
+@require_POST
+def cart_remove(request, post_id):
+    """Прибирає пост зі списку"""
+    cart = Cart(request)
+    cart.remove(post_id)
+    return _with_count_cookie(JsonResponse({'count': len(cart), 'quantity': 0}), cart)
@@ -1,15 +1,30 @@
 from django.contrib import admin
-from .models import Post, Category, Comment
+from .models import ArchivedComment, Post, Category, Comment, PostDailyStats
+from .analytics import SPARKLINE_DAYS, sparkline
+from .uploads import ValidatedImageField
+from django.db import models
+from django.db.models import Prefetch
+from django.utils import timezone
 from django.utils.html import format_html
+from datetime import timedelta
+
+from config.admin_utils import QueryBudgetMixin
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
-  list_display = ("id", "title", "author", "category", "image_tag", "created_at", "likes", "views")
-  list_editable = ("title", "author") 
+class PostAdmin(QueryBudgetMixin, admin.ModelAdmin):
+  list_display = ("id", "title", "author", "category", "image_tag", "created_at", "likes", "views", "views_trend")
+  list_editable = ("title",)
+  # Поле id замість <select> з усіма користувачами в кожному рядку
+  raw_id_fields = ("author",)
+  list_select_related = ("author", "category")
   prepopulated_fields = {"slug": ("title",)}
-  list_filter = ("created_at", "updated_at", "category") 
+  # Лише індексовані поля (category - FK, created_at - db_index)
+  list_filter = ("created_at", "category") 
   search_fields = ("title", "content")
+  formfield_overrides = {
+      models.ImageField: {"form_class": ValidatedImageField},
+  }
 
   def image_tag(self, obj):
       if obj.image:
@@ -21,6 +36,17 @@ class PostAdmin(admin.ModelAdmin):
     
   image_tag.short_description = "Image"
 
+  def get_queryset(self, request):
+      since = timezone.localdate() - timedelta(days=SPARKLINE_DAYS - 1)
+      return super().get_queryset(request).prefetch_related(
+          Prefetch("daily_stats", queryset=PostDailyStats.objects.filter(day__gte=since), to_attr="recent_stats")
+      )
+
+  def views_trend(self, obj):
+      return format_html('<span style="font-family: monospace; letter-spacing: 1px">{}</span>', sparkline(obj.recent_stats))
+
+  views_trend.short_description = f"Перегляди за {SPARKLINE_DAYS} дн"
+
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -30,11 +56,25 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(QueryBudgetMixin, admin.ModelAdmin):
     list_display = ("id", "author", "post", "short_body", "created_at")
-    list_filter = ("created_at", "author")
+    list_select_related = ("author", "post")
+    raw_id_fields = ("author", "post")
+    # Фільтр за автором будував список з усіх користувачів
+    list_filter = ("created_at",)
     search_fields = ("body", "author__username", "post__title")
 
     def short_body(self, obj):
         return obj.body[:50] + "..." if len(obj.body) > 50 else obj.body
-    short_body.short_description = "Текст"
\ No newline at end of file
+    short_body.short_description = "Текст"
+
+
+@admin.register(ArchivedComment)
+class ArchivedCommentAdmin(QueryBudgetMixin, admin.ModelAdmin):
+    list_display = ("id", "author", "post", "created_at", "archived_at")
+    list_select_related = ("author", "post")
+    raw_id_fields = ("author", "post")
+    search_fields = ("body",)
+
+    def has_add_permission(self, request):
+        return False
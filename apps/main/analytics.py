@@ -0,0 +1,194 @@
+"""
+Аналітика переглядів постів.
+
+Кожен перегляд дописується одним рядком у локальний append-only лог
+(ANALYTICS_LOG_DIR/events.log): це один системний виклик write() без
+звернень до БД, тож не сповільнює відповідь і витримує тисячі подій
+на секунду. Команда rollup_analytics ротує лог і агрегує події в денні
+таблиці PostDailyStats, ReferrerDailyStats та CategoryDailyStats.
+
+Формат рядка: timestamp<TAB>post_id<TAB>category_id<TAB>referrer_host
+"""
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LOG_NAME = "events.log"
+PROCESSING_SUFFIX = ".processing"
+
+# Скільки секунд чекати після ротації, поки процеси допишуть у старий файл
+ROTATE_GRACE_SECONDS = 1.0
+
+SPARKLINE_DAYS = 14
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def log_dir():
+    return Path(settings.ANALYTICS_LOG_DIR)
+
+
+def referrer_host(request):
+    """Домен, з якого прийшов користувач ('' для прямих заходів)"""
+    host = urlsplit(request.META.get("HTTP_REFERER", "")).hostname or ""
+    return host[:100]
+
+
+def record_post_view(request, post):
+    """Дописує подію перегляду в лог"""
+    line = f"{int(time.time())}\t{post.id}\t{post.category_id or ''}\t{referrer_host(request)}\n"
+    path = log_dir() / LOG_NAME
+    # Перегляд не повинен падати через аналітику: помилки диска лише логуються
+    try:
+        try:
+            # O_APPEND гарантує, що рядки з різних процесів не перемішаються
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    except OSError:
+        logger.exception("Не вдалося записати подію аналітики")
+        return
+    try:
+        os.write(fd, line.encode())
+    except OSError:
+        logger.exception("Не вдалося записати подію аналітики")
+    finally:
+        os.close(fd)
+
+
+def rotate_log():
+    """Перейменовує поточний лог і повертає всі файли, що чекають на агрегацію"""
+    directory = log_dir()
+    current = directory / LOG_NAME
+    if current.exists():
+        current.rename(directory / f"events-{time.time_ns()}{PROCESSING_SUFFIX}")
+        time.sleep(ROTATE_GRACE_SECONDS)
+    if not directory.exists():
+        return []
+    return sorted(directory.glob(f"*{PROCESSING_SUFFIX}"))
+
+
+def parse_events(paths):
+    """Агрегує події з файлів у лічильники по днях"""
+    per_post = Counter()
+    per_referrer = Counter()
+    per_category = Counter()
+    days = {}
+
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as log:
+            for line in log:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 4:
+                    continue
+                ts, post_id, category_id, referrer = parts
+                try:
+                    hour = int(ts) // 3600
+                    post_id = int(post_id)
+                    category_id = int(category_id) if category_id else None
+                except ValueError:
+                    continue
+                day = days.get(hour)
+                if day is None:
+                    moment = datetime.fromtimestamp(hour * 3600, tz=dt_timezone.utc)
+                    day = days[hour] = timezone.localtime(moment).date()
+                per_post[post_id, day] += 1
+                per_referrer[post_id, day, referrer] += 1
+                if category_id:
+                    per_category[category_id, day] += 1
+
+    return per_post, per_referrer, per_category
+
+
+def _upsert(model, counts, key_fields):
+    """Додає лічильники до існуючих денних рядків або створює нові"""
+    if not counts:
+        return
+    lookup = {f"{field}__in": {key[i] for key in counts} for i, field in enumerate(key_fields)}
+    existing = {
+        tuple(getattr(row, field) for field in key_fields): row
+        for row in model.objects.filter(**lookup)
+    }
+    to_update, to_create = [], []
+    for key, views in counts.items():
+        row = existing.get(key)
+        if row:
+            row.views += views
+            to_update.append(row)
+        else:
+            to_create.append(model(views=views, **dict(zip(key_fields, key))))
+    model.objects.bulk_update(to_update, ["views"], batch_size=500)
+    model.objects.bulk_create(to_create, batch_size=500)
+
+
+def rollup():
+    """
+    Агрегує всі накопичені події в денні таблиці. Повертає кількість подій.
+
+    Імена оброблених файлів записуються в AnalyticsBatch у тій самій
+    транзакції, що й лічильники, а файли видаляються після коміту. Якщо
+    процес упаде між комітом і видаленням, наступний запуск лише видалить
+    ці файли. Унікальне ім'я не дасть двом паралельним запускам порахувати
+    той самий файл: другий відкотиться з IntegrityError.
+    """
+    from .models import AnalyticsBatch, CategoryDailyStats, Category, Post, PostDailyStats, ReferrerDailyStats
+
+    paths = rotate_log()
+    if not paths:
+        return 0
+
+    names = [path.name for path in paths]
+    done = set(AnalyticsBatch.objects.filter(name__in=names).values_list("name", flat=True))
+    pending = [path for path in paths if path.name not in done]
+
+    per_post, per_referrer, per_category = parse_events(pending)
+
+    # Події видалених постів і категорій відкидаємо
+    post_ids = set(Post.objects.filter(id__in={post_id for post_id, _ in per_post}).values_list("id", flat=True))
+    category_ids = set(Category.objects.values_list("id", flat=True))
+    per_post = Counter({key: v for key, v in per_post.items() if key[0] in post_ids})
+    per_referrer = Counter({key: v for key, v in per_referrer.items() if key[0] in post_ids})
+    per_category = Counter({key: v for key, v in per_category.items() if key[0] in category_ids})
+
+    with transaction.atomic():
+        AnalyticsBatch.objects.bulk_create([AnalyticsBatch(name=path.name) for path in pending])
+        # Файли, яких давно немає на диску, більше не можуть повторитися
+        AnalyticsBatch.objects.exclude(name__in=names).filter(
+            processed_at__lt=timezone.now() - timedelta(days=1),
+        ).delete()
+        _upsert(PostDailyStats, per_post, ("post_id", "day"))
+        _upsert(ReferrerDailyStats, per_referrer, ("post_id", "day", "referrer"))
+        _upsert(CategoryDailyStats, per_category, ("category_id", "day"))
+
+    for path in paths:
+        path.unlink()
+    return sum(per_post.values())
+
+
+def pending_bytes():
+    """Обсяг подій, що ще не агреговані (для метрик)"""
+    directory = log_dir()
+    if not directory.exists():
+        return 0
+    return sum(path.stat().st_size for path in directory.glob("events*"))
+
+
+def sparkline(stats, days=SPARKLINE_DAYS):
+    """Рядок-спарклайн переглядів за останні дні з денних зведень"""
+    today = timezone.localdate()
+    by_day = {row.day: row.views for row in stats}
+    values = [by_day.get(today - timedelta(days=offset), 0) for offset in range(days - 1, -1, -1)]
+    peak = max(values)
+    if not peak:
+        return SPARK_CHARS[0] * days
+    return "".join(SPARK_CHARS[round(v / peak * (len(SPARK_CHARS) - 1))] for v in values)
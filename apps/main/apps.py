@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.main'
+
+    def ready(self):
+        from config.metrics import registry
+        from .analytics import pending_bytes
+        from .models import CommentNotification
+        from .startup import preload
+
+        registry.register_gauge(
+            "analytics_pending_bytes", "Обсяг подій переглядів, що чекають на rollup_analytics", pending_bytes,
+        )
+        registry.register_gauge(
+            "comment_notifications_pending", "Сповіщення про коментарі, що чекають на send_comment_digests",
+            CommentNotification.objects.count,
+        )
+        preload()
@@ -0,0 +1,108 @@
+"""
+Архів постів за місяцями та авторами.
+
+Навігація архіву (місяці й автори з кількістю постів) читається з
+маленьких зведених таблиць PostMonthCount і PostAuthorCount, а не
+GROUP BY по всіх постах. Таблиці оновлюються сигналами Post при
+створенні, видаленні й зміні автора; rebuild() перераховує їх з нуля
+(команда rebuild_archive_counts).
+
+Списки архіву гортаються курсором (created_at, id) останнього
+показаного поста - кожна сторінка є діапазонним запитом по індексу,
+без OFFSET і COUNT.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Post, PostAuthorCount, PostMonthCount
+
+
+def month_of(created_at):
+    """(рік, місяць) дати створення в часовому поясі сайту"""
+    local = timezone.localtime(created_at) if timezone.is_aware(created_at) else created_at
+    return local.year, local.month
+
+
+def month_bounds(year, month):
+    """Межі місяця [start, end) для фільтра по created_at"""
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    if settings.USE_TZ:
+        start, end = timezone.make_aware(start), timezone.make_aware(end)
+    return start, end
+
+
+def _adjust(model, delta, **lookup):
+    if delta > 0:
+        model.objects.get_or_create(**lookup)
+    model.objects.filter(**lookup).update(count=F("count") + delta)
+
+
+def post_added(created_at, author_id):
+    year, month = month_of(created_at)
+    with transaction.atomic():
+        _adjust(PostMonthCount, 1, year=year, month=month)
+        _adjust(PostAuthorCount, 1, author_id=author_id)
+
+
+def post_removed(created_at, author_id):
+    year, month = month_of(created_at)
+    with transaction.atomic():
+        _adjust(PostMonthCount, -1, year=year, month=month)
+        _adjust(PostAuthorCount, -1, author_id=author_id)
+
+
+def author_changed(old_author_id, new_author_id):
+    with transaction.atomic():
+        _adjust(PostAuthorCount, -1, author_id=old_author_id)
+        _adjust(PostAuthorCount, 1, author_id=new_author_id)
+
+
+def rebuild():
+    """Перераховує зведені таблиці за всіма постами; повертає (місяців, авторів)"""
+    months = {}
+    authors = {}
+    for created_at, author_id in Post.objects.order_by().values_list("created_at", "author_id").iterator():
+        key = month_of(created_at)
+        months[key] = months.get(key, 0) + 1
+        authors[author_id] = authors.get(author_id, 0) + 1
+
+    with transaction.atomic():
+        PostMonthCount.objects.all().delete()
+        PostAuthorCount.objects.all().delete()
+        PostMonthCount.objects.bulk_create(
+            PostMonthCount(year=year, month=month, count=count) for (year, month), count in months.items()
+        )
+        PostAuthorCount.objects.bulk_create(
+            PostAuthorCount(author_id=author_id, count=count) for author_id, count in authors.items()
+        )
+    return len(months), len(authors)
+
+
+def months():
+    """Місяці з постами, від новіших"""
+    return list(PostMonthCount.objects.filter(count__gt=0).order_by("-year", "-month"))
+
+
+def authors():
+    """Автори з постами, від найактивніших"""
+    return list(
+        PostAuthorCount.objects.filter(count__gt=0).select_related("author").order_by("-count", "author__username")
+    )
+
+
+def page(queryset, before=None, limit=None):
+    """
+    Повертає (пости, чи є ще старіші). before - курсор (created_at, id)
+    останнього показаного поста.
+    """
+    limit = limit or settings.ARCHIVE_PAGE_SIZE
+    if before:
+        created_at, post_id = before
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id))
+    posts = list(queryset.select_related("author").order_by("-created_at", "-id")[:limit + 1])
+    return posts[:limit], len(posts) > limit
@@ -0,0 +1,160 @@
+"""
+Прогрів кешів популярних сторінок.
+
+Після деплою або скидання кешу перші відвідувачі популярних постів
+платять за всі запити й рендеринг одночасно. warm() заздалегідь
+відкриває топ-N постів за переглядами, сторінки 1..K списку постів і
+першу сторінку кожної категорії, заповнюючи кеш відповідей, кеш
+карток постів і кеші процесу. Запити виконуються в обмеженому пулі
+потоків і позначаються як prerender, тож перегляди не рахуються.
+
+Кеші заповнюються в тому процесі, що рендерить сторінку, тож прогрів
+іде по HTTP до запущеного сайту (CACHE_WARM_URL або warm_cache --url):
+запити розходяться по воркерах так само, як запити відвідувачів.
+Рендеринг у поточному процесі (fetch_local) має сенс лише для спільного
+бекенду кешу (Redis, Memcached) і лише поза веб-воркерами - команда
+warm_cache без --url. warm_after_publish() після публікації чи
+редагування поста запитує сторінки по HTTP у фоновому потоці.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+
+from config.middleware import client_ip
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_publish_pool = None
+_publish_pool_lock = threading.Lock()
+
+
+def top_urls(posts=None, pages=None):
+    """URL найпопулярніших сторінок у порядку пріоритету"""
+    from .models import Category, Post
+
+    posts = settings.CACHE_WARM_TOP_POSTS if posts is None else posts
+    pages = settings.CACHE_WARM_LIST_PAGES if pages is None else pages
+
+    urls = [reverse("main:post_list")]
+    urls += [f"{reverse('main:post_list')}?{urlencode({'page': page})}" for page in range(2, pages + 1)]
+    urls += [
+        reverse("main:post_detail", args=[post_id, slug])
+        for post_id, slug in Post.objects.order_by("-views").values_list("id", "slug")[:posts]
+    ]
+    urls += [
+        reverse("main:post_list_by_category", args=[slug])
+        for slug in Category.objects.filter(post__isnull=False).distinct().values_list("slug", flat=True)
+    ]
+    return urls
+
+
+def _host():
+    host = next((host for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+    return host.lstrip(".") or "localhost"
+
+
+def shared_cache():
+    """Чи бачать кеш інші процеси (інакше прогрів у цьому процесі нікому не допоможе)"""
+    backend = settings.CACHES["default"]["BACKEND"]
+    return not backend.endswith((".LocMemCache", ".DummyCache"))
+
+
+def fetch_http(base_url, timeout=30):
+    """Функція для warm(): запитує сторінку у запущеного сайту як запит прогріву"""
+    base_url = base_url.rstrip("/")
+
+    def fetch(url):
+        request = Request(base_url + url, headers={"X-Prerender": "1"})
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            return error.code
+        except (URLError, OSError):
+            return None
+
+    return fetch
+
+
+def fetch_local(url):
+    """
+    Рендерить сторінку в цьому процесі через повний стек middleware.
+    Лише для команд: тестовий Client перепідключає сигнали запиту
+    глобально, що заважало б паралельним запитам веб-воркера.
+    """
+    from django.test import Client
+
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = _local.client = Client(HTTP_HOST=_host(), **{"blog.prerender": True})
+    try:
+        client.cookies.clear()
+        return client.get(url).status_code
+    finally:
+        # Потік пулу живе довше за запит - його з'єднання з БД закриваються одразу
+        connections.close_all()
+
+
+def warm(urls, fetch=fetch_local, workers=None):
+    """Прогріває сторінки в обмеженому пулі потоків; повертає {url: статус}"""
+    workers = workers or settings.CACHE_WARM_WORKERS
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(urls, pool.map(fetch, urls)))
+
+
+def _warm_post(post_id):
+    from .models import Post
+
+    try:
+        post = Post.objects.select_related("category").filter(pk=post_id).first()
+        if post is None:
+            return
+        urls = [post.get_absolute_url(), reverse("main:post_list")]
+        if post.category:
+            urls.append(post.category.get_absolute_url())
+    finally:
+        # Потік пулу живе довше за запит - його з'єднання з БД закривається одразу
+        connections.close_all()
+
+    fetch = fetch_http(settings.CACHE_WARM_URL)
+    for url in urls:
+        if fetch(url) != 200:
+            logger.warning("Не вдалося прогріти %s", url)
+
+
+def warm_after_publish(post_id):
+    """Ставить у фонову чергу прогрів поста та списків, у яких він з'являється"""
+    global _publish_pool
+    if not (settings.CACHE_WARM_ON_PUBLISH and settings.CACHE_WARM_URL):
+        return
+    with _publish_pool_lock:
+        if _publish_pool is None:
+            _publish_pool = ThreadPoolExecutor(
+                max_workers=settings.CACHE_WARM_WORKERS, thread_name_prefix="cache-warmer",
+            )
+    _publish_pool.submit(_warm_post, post_id)
+
+
+class PrerenderMiddleware:
+    """
+    Запити прогріву по HTTP мають заголовок X-Prerender. Він враховується
+    лише з довірених адрес (з урахуванням TRUSTED_PROXY_COUNT), інакше
+    будь-хто міг би приховувати перегляди.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.headers.get("X-Prerender") == "1" and client_ip(request) in settings.PRERENDER_ALLOWED_IPS:
+            request.META["blog.prerender"] = True
+        return self.get_response(request)
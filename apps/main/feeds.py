@@ -0,0 +1,51 @@
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import truncatewords
+from django.urls import reverse
+
+from .models import Category, Post
+
+FEED_ITEMS = 20
+
+
+class LatestPostsFeed(Feed):
+    title = "Blog"
+    description = "Нові пости блогу"
+
+    def link(self):
+        return reverse("main:post_list")
+
+    def items(self):
+        return Post.objects.select_related("author").order_by("-created_at")[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return truncatewords(item.content, 50)
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class CategoryPostsFeed(LatestPostsFeed):
+    def get_object(self, request, category_slug):
+        return get_object_or_404(Category, slug=category_slug)
+
+    def title(self, category):
+        return f"Blog - {category.name}"
+
+    def link(self, category):
+        return category.get_absolute_url()
+
+    def description(self, category):
+        return f"Нові пости в категорії «{category.name}»"
+
+    def items(self, category):
+        return Post.objects.filter(category=category).select_related("author").order_by("-created_at")[:FEED_ITEMS]
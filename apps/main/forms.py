@@ -1,10 +1,14 @@
 from django import forms
 from .models import Post, Comment
+from .uploads import ValidatedImageField
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ['category', 'title', 'slug', 'image', 'content']
+        field_classes = {
+            'image': ValidatedImageField,
+        }
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-teal-500 focus:border-transparent',
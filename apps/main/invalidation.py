@@ -0,0 +1,152 @@
+"""
+Лічильники поколінь для інвалідації кешів між воркерами.
+
+Кожен простір імен (posts, categories, comments, users) має лічильник, який
+збільшується при зміні відповідних моделей. Лічильники лежать у
+спільному файлі INVALIDATION_FILE, тож їх бачать усі процеси вузла без
+зовнішнього брокера. На початку кожного запиту InvalidationMiddleware
+робить один os.stat() цього файлу; якщо файл змінився, процес
+перечитує лічильники і скидає лише кеші тих просторів імен, чиє
+покоління зросло.
+
+Кеші в пам'яті процесу реєструються через local_cache() або
+on_invalidate(); кеші, що самі зберігають покоління (suggest), можуть
+просто порівнювати generation().
+"""
+import json
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: без блокування паралельні bump() можуть злитися в один
+    fcntl = None
+
+POSTS = "posts"
+CATEGORIES = "categories"
+COMMENTS = "comments"
+USERS = "users"
+
+_lock = threading.Lock()
+_stat_key = None
+_generations = {}
+_callbacks = defaultdict(list)
+_pending = threading.local()
+
+
+def _path():
+    return Path(settings.INVALIDATION_FILE)
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _file_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    # os.replace() у bump() щоразу дає новий inode, тож зміну видно навіть при грубому mtime
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def check():
+    """Перечитує лічильники, якщо файл змінився, і скидає застарілі кеші"""
+    global _stat_key, _generations
+
+    path = _path()
+    key = _file_key(path)
+    if key == _stat_key:
+        return
+
+    with _lock:
+        if key == _stat_key:
+            return
+        generations = _read(path)
+        changed = [
+            namespace for namespace in set(generations) | set(_generations)
+            if generations.get(namespace, 0) != _generations.get(namespace, 0)
+        ]
+        _generations = generations
+        _stat_key = key
+
+    for namespace in changed:
+        for callback in _callbacks[namespace]:
+            callback()
+
+
+def generation(namespace):
+    """Поточне покоління простору імен"""
+    check()
+    return _generations.get(namespace, 0)
+
+
+def bump(*namespaces):
+    """Збільшує покоління - всі кеші цих просторів імен стають застарілими в усіх процесах"""
+    path = _path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        generations = _read(path)
+        for namespace in namespaces:
+            generations[namespace] = generations.get(namespace, 0) + 1
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(generations))
+        os.replace(tmp_path, path)
+    check()
+
+
+def bump_on_commit(*namespaces):
+    """
+    Відкладає bump() до коміту транзакції і об'єднує всі простори імен,
+    накопичені за транзакцію, в один запис файлу.
+    """
+    pending = getattr(_pending, "namespaces", None)
+    if pending is None:
+        pending = _pending.namespaces = set()
+    pending.update(namespaces)
+    # Перший колбек після коміту скидає все накопичене, решта нічого не роблять.
+    # Після відкату накопичене скинеться з наступною транзакцією - зайва інвалідація безпечна
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    namespaces = getattr(_pending, "namespaces", None)
+    if namespaces:
+        _pending.namespaces = set()
+        bump(*namespaces)
+
+
+def on_invalidate(namespace, callback):
+    """Реєструє функцію, яку буде викликано після зміни покоління простору імен"""
+    _callbacks[namespace].append(callback)
+
+
+def local_cache(*namespaces):
+    """Словник у пам'яті процесу, який очищається при зміні будь-якого з просторів імен"""
+    store = {}
+    for namespace in namespaces:
+        on_invalidate(namespace, store.clear)
+    return store
+
+
+class InvalidationMiddleware:
+    """Один stat() на запит: кеші процесу скидаються до обробки view"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        check()
+        return self.get_response(request)
@@ -0,0 +1,53 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from django.utils import timezone
+
+from apps.main.models import ArchivedComment, Comment
+
+ARCHIVED_FIELDS = ("id", "post_id", "author_id", "body", "created_at", "updated_at")
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносить коментарі, старші за --days днів, до архівної таблиці невеликими "
+        "транзакціями. Основна таблиця та її індекси лишаються малими; сторінка поста "
+        "підвантажує архівні коментарі через той самий Comment.objects.page_for_post()"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.COMMENT_ARCHIVE_AFTER_DAYS,
+            help="Вік коментаря в днях, після якого він архівується",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Кількість коментарів в одній транзакції")
+        parser.add_argument("--pause", type=float, default=0.0, help="Пауза між пакетами в секундах")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+        total = 0
+
+        # Читання й запис в одній БД: з репліки видалені рядки повертались би знову
+        using = router.db_for_write(Comment)
+
+        while True:
+            with transaction.atomic(using=using):
+                rows = list(
+                    Comment.objects.using(using).filter(created_at__lt=cutoff)
+                    .order_by("created_at", "id")
+                    .values(*ARCHIVED_FIELDS)[:batch_size]
+                )
+                if not rows:
+                    break
+                # ignore_conflicts: якщо попередній запуск перервався після вставки, повтор безпечний
+                ArchivedComment.objects.using(using).bulk_create([ArchivedComment(**row) for row in rows], ignore_conflicts=True)
+                Comment.objects.using(using).filter(id__in=[row["id"] for row in rows]).delete()
+            total += len(rows)
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(f"Заархівовано {total} коментарів, старших за {options['days']} дн"))
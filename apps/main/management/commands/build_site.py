@@ -0,0 +1,240 @@
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Max
+from django.urls import reverse
+
+from apps.main.archive import month_of
+from apps.main.models import ArchivedComment, Category, Comment, Post, RelatedPost
+from apps.main.views import POSTS_PER_PAGE, SORT_OPTIONS
+
+MANIFEST_NAME = ".build-manifest.json"
+
+_client = None
+
+
+def digest(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+# Частини рядка поста (id, slug, category_id, updated_at, views, trending_score),
+# від яких залежать різні сторінки. Лічильники переглядів і рейтинг змінюються
+# постійно, тож входять лише у відбитки сторінок, що їх показують
+def _content(post):
+    """RSS і sitemap: лише адреса, категорія і час зміни"""
+    return post[:4]
+
+
+def _card(post):
+    """Картка поста у списках і архіві показує кількість переглядів"""
+    return post[0], post[3], post[4]
+
+
+def _ranked(post):
+    """?sort=trending: ще й порядок за рейтингом"""
+    return (*_card(post), post[5])
+
+
+def output_path(url, content_type):
+    """
+    /post/1/slug           -> post/1/slug/index.html
+    /?page=2&sort=new      -> index@page=2&sort=new.html
+    /feed/                 -> feed/index.xml
+    /sitemap.xml           -> sitemap.xml
+    """
+    parts = urlsplit(url)
+    path = parts.path.strip("/")
+    if os.path.splitext(path)[1]:
+        return path
+    extension = ".xml" if "xml" in content_type else ".html"
+    name = f"index@{parts.query}{extension}" if parts.query else f"index{extension}"
+    return f"{path}/{name}" if path else name
+
+
+def _init_worker(host):
+    import django
+    django.setup()
+
+    from django.test import Client
+
+    global _client
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, host]
+    # blog.prerender: post_detail не рахує перегляд
+    _client = Client(HTTP_HOST=host, **{"blog.prerender": True})
+
+
+def _render(task):
+    url, output_dir = task
+    response = _client.get(url)
+    if response.status_code != 200:
+        return url, response.status_code, None
+
+    content = b"".join(response.streaming_content) if response.streaming else response.content
+    relative = output_path(url, response.get("Content-Type", ""))
+    path = Path(output_dir) / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+    return url, 200, relative
+
+
+class Command(BaseCommand):
+    help = (
+        "Рендерить публічну частину блогу (списки постів з категоріями, сортуваннями і сторінками, "
+        "архів за місяцями й авторами, пости, RSS і sitemap) у статичні файли. Повторний запуск "
+        "перерендерює лише сторінки, чиї пости, категорії або коментарі змінилися (див. маніфест .build-manifest.json). "
+        "Для nginx: try_files $uri/index@$args.html $uri/index.html $uri/index.xml $uri =404; "
+        "static/ і media/ роздаються окремо (collectstatic, MEDIA_ROOT)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Каталог для статичних файлів")
+        parser.add_argument("--host", default="localhost", help="Ім'я хоста для абсолютних URL у RSS і sitemap")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Кількість процесів рендерингу")
+        parser.add_argument("--force", action="store_true", help="Перерендерити все (наприклад, після зміни шаблонів)")
+
+    def handle(self, *args, **options):
+        output_dir = Path(options["output"]).resolve()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = output_dir / MANIFEST_NAME
+        manifest = {} if options["force"] else self.load_manifest(manifest_path)
+
+        started = time.perf_counter()
+        pages = self.plan()
+        stale = [url for url, fingerprint in pages.items() if manifest.get(url, [None])[0] != fingerprint]
+        removed = self.remove_missing(output_dir, manifest, pages)
+        self.stdout.write(f"Сторінок: {len(pages)}, до рендерингу: {len(stale)}, видалено: {removed}")
+
+        failed = []
+        if stale:
+            # Процеси отримують власні з'єднання з БД, а не копії батьківських
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=_init_worker, initargs=(options["host"],),
+            ) as pool:
+                tasks = [(url, str(output_dir)) for url in stale]
+                for url, status, relative in pool.map(_render, tasks, chunksize=8):
+                    if status == 200:
+                        manifest[url] = [pages[url], relative]
+                    else:
+                        manifest.pop(url, None)
+                        failed.append((url, status))
+
+        tmp_path = manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=0))
+        os.replace(tmp_path, manifest_path)
+
+        for url, status in failed:
+            self.stderr.write(f"HTTP {status}: {url}")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Відрендерено {len(stale) - len(failed)} сторінок за {elapsed:.1f} s у {output_dir}"
+        ))
+        if failed:
+            raise CommandError(f"Не вдалося відрендерити {len(failed)} сторінок")
+
+    def load_manifest(self, path):
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def remove_missing(self, output_dir, manifest, pages):
+        """Видаляє файли сторінок, яких більше немає (видалені пости, зменшена кількість сторінок)"""
+        removed = 0
+        for url in [url for url in manifest if url not in pages]:
+            _, relative = manifest.pop(url)
+            try:
+                (output_dir / relative).unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def plan(self):
+        """{url: відбиток даних, з яких рендериться сторінка}"""
+        posts = list(Post.objects.order_by().values_list(
+            "id", "slug", "category_id", "updated_at", "views", "trending_score",
+        ))
+        categories = {
+            category_id: (name, slug)
+            for category_id, name, slug in Category.objects.values_list("id", "name", "slug")
+        }
+        # Меню категорій є на кожній сторінці
+        nav = digest(sorted(categories.items()), sorted({post[2] for post in posts if post[2]}))
+
+        comments = {}
+        for model in (Comment, ArchivedComment):
+            for post_id, count, last_id in (
+                model.objects.order_by().values("post").annotate(count=Count("id"), last=Max("id"))
+                .values_list("post", "count", "last")
+            ):
+                comments.setdefault(post_id, []).append((count, last_id))
+
+        updated = {post[0]: post[3] for post in posts}
+        related = {}
+        for post_id, related_id in RelatedPost.objects.order_by("post", "-score").values_list("post", "related"):
+            related.setdefault(post_id, []).append((related_id, updated.get(related_id)))
+
+        pages = {}
+        content = digest(nav, sorted(_content(post) for post in posts))
+
+        # Списки: для кожної категорії - відбиток лише її постів
+        scopes = [(reverse("main:post_list"), posts)]
+        for category_id, (_, slug) in categories.items():
+            in_category = [post for post in posts if post[2] == category_id]
+            if in_category:
+                scopes.append((reverse("main:post_list_by_category", args=[slug]), in_category))
+                pages[reverse("main:category_feed", args=[slug])] = digest(
+                    categories[category_id], sorted(_content(post) for post in in_category),
+                )
+
+        for path, scope_posts in scopes:
+            page_count = max(1, math.ceil(len(scope_posts) / POSTS_PER_PAGE))
+            cards = digest(nav, sorted(_card(post) for post in scope_posts))
+            ranked = digest(nav, sorted(_ranked(post) for post in scope_posts))
+            for sort in (None, *SORT_OPTIONS):
+                sort_query = {"sort": sort} if sort else {}
+                fingerprint = ranked if sort == "trending" else cards
+                pages[f"{path}?{urlencode(sort_query)}" if sort else path] = fingerprint
+                for page in range(1, page_count + 1):
+                    # Порядок параметрів як у посиланнях пагінації: ?page=N&sort=...
+                    pages[f"{path}?{urlencode({'page': page, **sort_query})}"] = fingerprint
+
+        for post_id, slug, category_id, updated_at, views, _ in posts:
+            pages[reverse("main:post_detail", args=[post_id, slug])] = digest(
+                nav, updated_at, views, categories.get(category_id), comments.get(post_id), related.get(post_id),
+            )
+
+        # Архів за місяцями й авторами: ті самі курсорні сторінки ?before=, що й на сайті
+        archive_posts = sorted(
+            Post.objects.order_by().values_list("created_at", "id", "author__username"), reverse=True,
+        )
+        archives = {}
+        for created_at, post_id, username in archive_posts:
+            archives.setdefault(reverse("main:archive_month", args=month_of(created_at)), []).append((created_at, post_id))
+            archives.setdefault(reverse("main:author_posts", args=[username]), []).append((created_at, post_id))
+        # Навігація архіву (місяці й автори з кількістю постів) є на кожній його сторінці
+        archive_nav = digest(nav, sorted((path, len(scope_posts)) for path, scope_posts in archives.items()))
+        by_id = {post[0]: post for post in posts}
+        for path, scope_posts in archives.items():
+            fingerprint = digest(archive_nav, sorted(
+                _card(by_id[post_id]) for _, post_id in scope_posts if post_id in by_id
+            ))
+            pages[path] = fingerprint
+            for created_at, post_id in scope_posts[settings.ARCHIVE_PAGE_SIZE - 1:-1:settings.ARCHIVE_PAGE_SIZE]:
+                pages[f"{path}?{urlencode({'before': f'{created_at.isoformat()}_{post_id}'})}"] = fingerprint
+
+        pages[reverse("main:post_feed")] = content
+        pages[reverse("sitemap")] = content
+        return pages
@@ -0,0 +1,43 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from apps.main.storage import BLOB_DIR, referenced_names, release
+
+
+class Command(BaseCommand):
+    help = (
+        "Видаляє медіафайли зі сховища за хешем, на які не посилається жоден запис "
+        "(наприклад, залишені через відкладене звільнення або перерване збереження)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Лише показати файли без посилань")
+
+    def handle(self, *args, **options):
+        root = default_storage.path(BLOB_DIR)
+        blobs = []
+        for directory, _, files in os.walk(root):
+            for file_name in files:
+                if file_name.startswith("."):
+                    continue
+                blobs.append(os.path.relpath(os.path.join(directory, file_name), default_storage.location).replace(os.sep, "/"))
+
+        # Один прохід по кожному полю замість COUNT на кожен файл
+        referenced = referenced_names()
+        orphans = [name for name in blobs if name not in referenced]
+        # Посилання, що з'явилися після першого проходу, перевіряємо вже лише серед кандидатів
+        referenced |= referenced_names(orphans)
+
+        removed = 0
+        for name in orphans:
+            if options["dry_run"]:
+                if name not in referenced:
+                    self.stdout.write(name)
+                    removed += 1
+            elif release(name, referenced=referenced):
+                removed += 1
+
+        action = "Знайдено" if options["dry_run"] else "Видалено"
+        self.stdout.write(self.style.SUCCESS(f"{action} {removed} файлів без посилань"))
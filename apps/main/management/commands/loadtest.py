@@ -0,0 +1,306 @@
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urlsplit
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve, reverse
+
+from apps.main.models import Category, Post
+
+# "GET /path HTTP/1.1" у common/combined форматі або просто "GET /path"
+LOG_LINE_RE = re.compile(r'"?(GET|POST|HEAD) (\S+)(?: HTTP/[\d.]+)?"?')
+
+SEARCH_WORDS = ["україна", "війна", "новини", "світ", "рада", "пенсія", "здоров"]
+
+# Частки синтетичного мікса запитів
+SYNTHETIC_MIX = [
+    ("list", 30),
+    ("detail", 35),
+    ("category", 12),
+    ("search", 10),
+    ("comment", 5),
+    ("contact", 3),
+    ("suggest", 5),
+]
+
+
+class NoRedirect(HTTPRedirectHandler):
+    """Кожен запит вимірюється окремо, без автоматичного переходу за редиректом"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Навантажувальний тест: відтворює записаний або синтетичний лог доступу "
+        "проти локально запущеного сервера і звітує про пропускну здатність та перцентилі затримки"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Адреса вже запущеного сервера (інакше запускається runserver)")
+        parser.add_argument("--log", help="Файл логу доступу (common/combined або рядки 'GET /path')")
+        parser.add_argument("--requests", type=int, default=1000, help="Кількість запитів (для синтетичного мікса)")
+        parser.add_argument("--concurrency", type=int, default=8, help="Кількість паралельних клієнтів")
+        parser.add_argument("--username", help="Користувач для запитів з коментарями")
+        parser.add_argument("--password", help="Пароль користувача")
+        parser.add_argument("--seed", type=int, default=None, help="Seed для відтворюваного синтетичного мікса")
+        parser.add_argument("--timeout", type=float, default=30, help="Таймаут одного запиту в секундах")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options["seed"])
+        plan = self.load_log(options["log"]) if options["log"] else self.synthetic_plan(options["requests"])
+        if not plan:
+            raise CommandError("Немає запитів для відтворення")
+
+        server = None
+        base_url = options["url"]
+        if not base_url:
+            server, base_url = self.start_server()
+        self.base_url = base_url.rstrip("/")
+
+        try:
+            self.local = threading.local()
+            self.results = defaultdict(list)
+            self.errors = defaultdict(int)
+            self.lock = threading.Lock()
+
+            self.stdout.write(f"Відтворення {len(plan)} запитів на {self.base_url}, клієнтів: {options['concurrency']}")
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                list(pool.map(self.send, plan))
+            elapsed = time.perf_counter() - started
+        finally:
+            if server:
+                server.terminate()
+                server.wait(timeout=10)
+
+        self.report(elapsed)
+
+    # --- План запитів ---
+
+    def load_log(self, path):
+        plan = []
+        with open(path, encoding="utf-8", errors="replace") as log:
+            for line in log:
+                match = LOG_LINE_RE.search(line)
+                if not match:
+                    continue
+                method, url = match.groups()
+                if method == "POST":
+                    action = self.post_action(urlsplit(url).path)
+                    if action:
+                        plan.append(action)
+                else:
+                    plan.append(("GET", url, None))
+        return plan
+
+    def post_action(self, path):
+        """POST з логу не містить тіла, тож тіло генерується за типом сторінки"""
+        if path == reverse("contact:contact"):
+            return self.contact_request()
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return None
+        if match.view_name in ("main:post_detail", "main:comment_create"):
+            return self.comment_request(match.kwargs["id"])
+        return None
+
+    def synthetic_plan(self, count):
+        posts = list(Post.objects.values_list("id", "slug"))
+        categories = list(Category.objects.values_list("slug", flat=True))
+        if not posts:
+            raise CommandError("У БД немає постів для синтетичного мікса")
+
+        kinds, weights = zip(*SYNTHETIC_MIX)
+        plan = []
+        for kind in self.random.choices(kinds, weights=weights, k=count):
+            post_url = reverse("main:post_detail", args=self.random.choice(posts))
+            if kind == "list":
+                query = {"page": self.random.randint(1, 3)}
+                sort = self.random.choice([None, "new", "old", "popular", "trending"])
+                if sort:
+                    query["sort"] = sort
+                plan.append(("GET", f"{reverse('main:post_list')}?{urlencode(query)}", None))
+            elif kind == "detail":
+                plan.append(("GET", post_url, None))
+            elif kind == "category" and categories:
+                plan.append(("GET", reverse("main:post_list_by_category", args=[self.random.choice(categories)]), None))
+            elif kind == "search":
+                plan.append(("GET", f"{reverse('main:post_list')}?{urlencode({'q': self.random.choice(SEARCH_WORDS)})}", None))
+            elif kind == "suggest":
+                word = self.random.choice(SEARCH_WORDS)
+                plan.append(("GET", f"{reverse('main:search_suggest')}?{urlencode({'q': word[:self.random.randint(1, len(word))]})}", None))
+            elif kind == "comment" and self.options["username"]:
+                plan.append(self.comment_request(self.random.choice(posts)[0]))
+            elif kind == "contact":
+                plan.append(self.contact_request())
+            else:
+                plan.append(("GET", post_url, None))
+        return plan
+
+    def comment_request(self, post_id):
+        return ("POST", reverse("main:comment_create", args=[post_id]), {
+            "body": f"Коментар з навантажувального тесту {self.random.randint(1, 10**9)}",
+        })
+
+    def contact_request(self):
+        return ("POST", reverse("contact:contact"), {
+            "name": "Навантажувальний тест",
+            "email": "loadtest@example.com",
+            "subject": "Навантажувальний тест",
+            "message": "Повідомлення з навантажувального тесту.",
+        })
+
+    # --- Сервер ---
+
+    def start_server(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        env = {
+            **os.environ,
+            "ALLOWED_HOSTS": "127.0.0.1,localhost",
+            # Листи з контактної форми не повинні реально надсилатися
+            "EMAIL_BACKEND": "django.core.mail.backends.locmem.EmailBackend",
+        }
+        server = subprocess.Popen(
+            [sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload", "--skip-checks"],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                return server, f"http://127.0.0.1:{port}"
+            except OSError:
+                if server.poll() is not None:
+                    break
+                time.sleep(0.1)
+        server.terminate()
+        raise CommandError("Не вдалося запустити локальний сервер")
+
+    # --- Клієнти ---
+
+    def client(self):
+        """Окремий клієнт з cookie (і, за потреби, сесією користувача) для кожного потоку"""
+        if not hasattr(self.local, "opener"):
+            self.local.jar = CookieJar()
+            self.local.opener = build_opener(HTTPCookieProcessor(self.local.jar), NoRedirect)
+            if self.options["username"]:
+                self.login()
+        return self.local.opener
+
+    def csrf_token(self, page=None):
+        """
+        CSRF-токен з cookie; якщо його ще немає - відкривається сторінка з формою
+        або cart:cart_state, який видає cookie так само, як для JS на сайті
+        """
+        token = next((c.value for c in self.local.jar if c.name == settings.CSRF_COOKIE_NAME), "")
+        if not token or page:
+            self.local.opener.open(self.base_url + (page or reverse("cart:cart_state")), timeout=self.options["timeout"]).read()
+            token = next((c.value for c in self.local.jar if c.name == settings.CSRF_COOKIE_NAME), "")
+        return token
+
+    def login(self):
+        login_path = reverse("accounts:login")
+        data = {
+            "username": self.options["username"],
+            "password": self.options["password"] or "",
+            "csrfmiddlewaretoken": self.csrf_token(login_path),
+        }
+        try:
+            self.local.opener.open(
+                Request(self.base_url + login_path, data=urlencode(data).encode()),
+                timeout=self.options["timeout"],
+            )
+        except HTTPError as error:
+            if error.code != 302:
+                raise CommandError(f"Не вдалося увійти як {self.options['username']}: HTTP {error.code}")
+
+    def send(self, item):
+        method, url, data = item
+        opener = self.client()
+        path = urlsplit(url).path
+        request = Request(self.base_url + url, method=method)
+        if data is not None:
+            data = {**data, "csrfmiddlewaretoken": self.csrf_token()}
+            request.data = urlencode(data).encode()
+            # Коментарі повертають HTML-фрагмент, як для fetch на сторінці
+            request.add_header("X-Requested-With", "XMLHttpRequest")
+
+        started = time.perf_counter()
+        status = None
+        try:
+            with opener.open(request, timeout=self.options["timeout"]) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except (URLError, OSError):
+            status = None
+        elapsed = time.perf_counter() - started
+
+        label = self.route_name(path, method)
+        with self.lock:
+            self.results[label].append(elapsed)
+            if status is None or status >= 400:
+                self.errors[label] += 1
+
+    def route_name(self, path, method):
+        try:
+            name = resolve(path).view_name
+        except Resolver404:
+            name = path
+        return f"{method} {name}"
+
+    # --- Звіт ---
+
+    def report(self, elapsed):
+        all_latencies = sorted(l for latencies in self.results.values() for l in latencies)
+        total = len(all_latencies)
+        errors = sum(self.errors.values())
+
+        self.stdout.write("")
+        self.stdout.write(f"Запитів: {total} за {elapsed:.2f} s, пропускна здатність {total / elapsed:.1f} req/s")
+        self.stdout.write(f"Помилки: {errors} ({errors / total * 100:.2f}%)")
+        self.stdout.write(
+            f"Затримка, ms: p50 {percentile(all_latencies, 50) * 1000:.1f}  "
+            f"p95 {percentile(all_latencies, 95) * 1000:.1f}  p99 {percentile(all_latencies, 99) * 1000:.1f}"
+        )
+
+        self.stdout.write("")
+        header = f"{'URL':<36}{'к-сть':>8}{'помилки':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for label, latencies in sorted(self.results.items(), key=lambda item: -len(item[1])):
+            latencies.sort()
+            self.stdout.write(
+                f"{label:<36}{len(latencies):>8}{self.errors[label]:>9}"
+                f"{percentile(latencies, 50) * 1000:>9.1f}{percentile(latencies, 95) * 1000:>9.1f}"
+                f"{percentile(latencies, 99) * 1000:>9.1f}"
+            )
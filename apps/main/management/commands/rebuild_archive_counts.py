@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.main import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Перераховує зведені таблиці навігації архіву (PostMonthCount, PostAuthorCount) за всіма постами. "
+        "Потрібно лише після масових змін в обхід сигналів (bulk_create, update(), SQL)"
+    )
+
+    def handle(self, *args, **options):
+        months, authors = archive.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Перераховано: місяців {months}, авторів {authors}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.main.related import DEFAULT_TOP_K, rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Повністю перебудовує таблицю схожих постів (RelatedPost)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=DEFAULT_TOP_K,
+            help=f"Кількість сусідів для кожного поста (за замовчуванням {DEFAULT_TOP_K})",
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild_all(k=options["top"])
+        self.stdout.write(self.style.SUCCESS(f"Збережено {created} зв'язків між постами"))
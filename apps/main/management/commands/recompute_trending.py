@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.main.trending import recompute_scores
+
+
+class Command(BaseCommand):
+    help = "Перераховує рейтинг трендовості постів (запускати періодично, напр. щогодини через cron)"
+
+    def handle(self, *args, **options):
+        updated = recompute_scores()
+        self.stdout.write(self.style.SUCCESS(f"Оновлено рейтинг для {updated} постів"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.main.analytics import rollup
+
+
+class Command(BaseCommand):
+    help = "Агрегує лог переглядів у денні зведення (запускати періодично через cron)"
+
+    def handle(self, *args, **options):
+        processed = rollup()
+        self.stdout.write(self.style.SUCCESS(f"Оброблено {processed} подій"))
@@ -0,0 +1,121 @@
+import logging
+import smtplib
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+
+from apps.main.models import Comment, CommentNotification
+from apps.main.views import comment_url
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Надсилає авторам постів дайджести нових коментарів: один лист на автора з усіма "
+        "коментарями з черги, пакети листів ідуть через одне SMTP-з'єднання. "
+        "Запускається періодично (cron), тож кількість листів не залежить від активності обговорень"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.COMMENT_DIGEST_BATCH_SIZE,
+            help="Скільки листів надсилати через одне SMTP-з'єднання",
+        )
+        parser.add_argument(
+            "--max-comments", type=int, default=settings.COMMENT_DIGEST_MAX_COMMENTS,
+            help="Скільки найновіших коментарів показувати в одному листі",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Лише показати, скільки листів буде надіслано")
+
+    def handle(self, *args, **options):
+        # Черга читається з тієї ж БД, де видаляються надіслані сповіщення,
+        # інакше до синхронізації репліки ті самі дайджести йшли б повторно
+        notifications = CommentNotification.objects.using(router.db_for_write(CommentNotification))
+
+        # Коментарі, що з'являться під час надсилання, підуть у наступний дайджест
+        last_id = notifications.aggregate(last=Max("id"))["last"]
+        if last_id is None:
+            self.stdout.write("Черга сповіщень порожня")
+            return
+        pending = notifications.filter(id__lte=last_id)
+        totals = dict(
+            pending.order_by().values("recipient").annotate(total=Count("id")).values_list("recipient", "total")
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Листів: {len(totals)}, коментарів: {sum(totals.values())}")
+            return
+
+        recipients = sorted(totals)
+        batch_size = options["batch_size"]
+        sent = skipped = failed = 0
+        for start in range(0, len(recipients), batch_size):
+            digests = []
+            done = []
+            for recipient_id in recipients[start:start + batch_size]:
+                message = self.build_digest(pending, recipient_id, totals[recipient_id], options["max_comments"])
+                if message is None:
+                    # Немає адреси або користувач неактивний - сповіщення просто відкидаються
+                    done.append(recipient_id)
+                    skipped += 1
+                else:
+                    digests.append((recipient_id, message))
+
+            if digests:
+                # Одне з'єднання на пакет; лист, що не пішов, лишається в черзі до наступного запуску
+                with get_connection() as connection:
+                    for recipient_id, message in digests:
+                        try:
+                            connection.send_messages([message])
+                        except (smtplib.SMTPException, OSError):
+                            logger.exception("Не вдалося надіслати дайджест користувачу %s", recipient_id)
+                            failed += 1
+                        else:
+                            done.append(recipient_id)
+                            sent += 1
+            pending.filter(recipient__in=done).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Надіслано {sent} дайджестів, пропущено {skipped} (без email), помилок: {failed}"
+        ))
+        if failed:
+            raise CommandError(f"Не вдалося надіслати {failed} дайджестів, вони лишилися в черзі")
+
+    def build_digest(self, pending, recipient_id, total, max_comments):
+        notifications = list(
+            pending.filter(recipient_id=recipient_id)
+            .select_related("recipient", "comment__author", "comment__post")
+            .order_by("-id")[:max_comments]
+        )
+        if not notifications:
+            return None
+        recipient = notifications[0].recipient
+        if not (recipient.email and recipient.is_active):
+            return None
+
+        posts = {}
+        newest_ids = {}
+        for notification in notifications:
+            comment = notification.comment
+            if comment.post_id not in newest_ids:
+                newest, _ = Comment.objects.page_for_post(comment.post)
+                newest_ids[comment.post_id] = {newest_comment.id for newest_comment in newest}
+            posts.setdefault(comment.post, []).append((comment, comment_url(comment, newest_ids[comment.post_id])))
+
+        body = render_to_string("main/emails/comment_digest.txt", {
+            "recipient": recipient,
+            "posts": posts.items(),
+            "total": total,
+            "more": total - len(notifications),
+            "site_url": settings.SITE_URL.rstrip("/"),
+        })
+        return EmailMessage(
+            subject=f"Нові коментарі до ваших постів ({total})",
+            body=body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[recipient.email],
+        )
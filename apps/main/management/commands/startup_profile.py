@@ -0,0 +1,88 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Скрипт виконується в окремому «холодному» процесі
+PROFILE_SCRIPT = r"""
+import json, sys, time
+
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+result = {"setup": time.perf_counter() - started}
+
+if __WARMUP__:
+    from apps.main.startup import warmup
+    result["warmup_steps"] = {k: v / 1000 for k, v in warmup().items()}
+    result["warmup"] = sum(result["warmup_steps"].values())
+
+from django.conf import settings
+from django.test import Client
+from django.test.utils import override_settings
+
+override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]).enable()
+client = Client()
+for label in ("first_request", "second_request"):
+    started = time.perf_counter()
+    response = client.get(__PATH__)
+    result[label] = time.perf_counter() - started
+    result["status"] = response.status_code
+
+print("STARTUP_PROFILE " + json.dumps(result))
+"""
+
+IMPORT_TIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+class Command(BaseCommand):
+    help = "Вимірює вартість холодного старту воркера: імпорти, налаштування Django і перший запит"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/", help="URL першого запиту (за замовчуванням /)")
+        parser.add_argument("--warmup", action="store_true", help="Виконати прогрів перед першим запитом")
+        parser.add_argument("--imports", type=int, default=10, help="Скільки найдорожчих імпортів показати")
+
+    def handle(self, *args, **options):
+        script = PROFILE_SCRIPT.replace("__WARMUP__", repr(options["warmup"])).replace("__PATH__", repr(options["path"]))
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings")}
+
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        line = next((l for l in process.stdout.splitlines() if l.startswith("STARTUP_PROFILE ")), None)
+        if process.returncode or line is None:
+            raise CommandError(f"Процес профілювання завершився з помилкою:\n{process.stderr[-2000:]}")
+
+        result = json.loads(line.split(" ", 1)[1])
+        self.stdout.write(f"Налаштування Django (імпорти + setup): {result['setup'] * 1000:8.1f} ms")
+        if "warmup" in result:
+            self.stdout.write(f"Прогрів:                              {result['warmup'] * 1000:8.1f} ms")
+            for step, seconds in result["warmup_steps"].items():
+                self.stdout.write(f"  {step:<35}{seconds * 1000:8.1f} ms")
+        self.stdout.write(f"Перший запит {options['path']} [{result['status']}]:  {result['first_request'] * 1000:8.1f} ms")
+        self.stdout.write(f"Другий запит:                         {result['second_request'] * 1000:8.1f} ms")
+        cold_cost = result["first_request"] - result["second_request"]
+        self.stdout.write(self.style.WARNING(f"Ціна холодного першого запиту:        {cold_cost * 1000:8.1f} ms"))
+
+        if options["imports"]:
+            self.stdout.write("\nНайдорожчі пакети верхнього рівня (кумулятивно, ms):")
+            for cumulative, name in self.top_imports(process.stderr, options["imports"]):
+                self.stdout.write(f"  {cumulative / 1000:8.1f}  {name}")
+
+    def top_imports(self, stderr, limit):
+        """Розбирає вивід python -X importtime і повертає найдорожчі модулі верхнього рівня"""
+        imports = []
+        for match in IMPORT_TIME_RE.finditer(stderr):
+            _, cumulative, indent, name = match.groups()
+            if len(indent) == 1:
+                imports.append((int(cumulative), name))
+        return sorted(imports, reverse=True)[:limit]
@@ -0,0 +1,47 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from config.db_router import PRIMARY_ALIAS, REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Копіює основну SQLite БД у репліку (DATABASE_REPLICA_NAME) через backup API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Повторювати синхронізацію кожні N секунд (0 - один раз)",
+        )
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in connections.settings:
+            raise CommandError("Репліка не налаштована: задайте DATABASE_REPLICA_NAME")
+
+        primary = connections.settings[PRIMARY_ALIAS]
+        replica = connections.settings[REPLICA_ALIAS]
+        if not (primary["ENGINE"].endswith("sqlite3") and replica["ENGINE"].endswith("sqlite3")):
+            raise CommandError("sync_replica підтримує лише SQLite; для інших СУБД використовуйте їхню реплікацію")
+
+        while True:
+            started = time.perf_counter()
+            self.sync(str(primary["NAME"]), str(replica["NAME"]))
+            self.stdout.write(self.style.SUCCESS(
+                f"Репліку синхронізовано за {(time.perf_counter() - started) * 1000:.1f} ms"
+            ))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def sync(self, source_path, target_path):
+        # backup() дає узгоджений знімок навіть під час записів, а читачі
+        # репліки бачать нові дані одразу після завершення копіювання
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
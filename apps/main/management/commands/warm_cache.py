@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.main.cache_warmer import fetch_http, fetch_local, shared_cache, top_urls, warm
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогріває кеші популярних сторінок після деплою: топ постів за переглядами, "
+        "перші сторінки списку та кожну категорію. Перегляди не рахуються"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=settings.CACHE_WARM_TOP_POSTS, help="Скільки найпопулярніших постів")
+        parser.add_argument("--pages", type=int, default=settings.CACHE_WARM_LIST_PAGES, help="Скільки перших сторінок списку")
+        parser.add_argument("--workers", type=int, default=settings.CACHE_WARM_WORKERS, help="Розмір пулу потоків")
+        parser.add_argument(
+            "--url", default=settings.CACHE_WARM_URL,
+            help="Адреса запущеного сайту (типово CACHE_WARM_URL): сторінки запитуються по HTTP і "
+                 "прогрівають кеші сервера. Без адреси рендеринг іде в цьому процесі - лише для "
+                 "спільного бекенду кешу",
+        )
+        parser.add_argument("--timeout", type=float, default=30, help="Таймаут HTTP-запиту в секундах")
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            fetch = fetch_http(options["url"], options["timeout"])
+        elif shared_cache():
+            fetch = fetch_local
+        else:
+            # Кеш у пам'яті цього процесу зникне разом з ним, не дійшовши до веб-воркерів
+            raise CommandError(
+                "Кеш не спільний між процесами (LocMemCache): вкажіть --url або CACHE_WARM_URL запущеного сайту"
+            )
+        urls = top_urls(options["posts"], options["pages"])
+
+        started = time.perf_counter()
+        results = warm(urls, fetch, options["workers"])
+        elapsed = time.perf_counter() - started
+
+        failed = {url: status for url, status in results.items() if status != 200}
+        for url, status in failed.items():
+            self.stderr.write(f"{status or 'немає відповіді'}: {url}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Прогріто {len(results) - len(failed)} з {len(results)} сторінок за {elapsed:.2f} s"
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.10 on 2026-10-19 03:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_relatedpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Рейтинг трендовості'),
+        ),
+        migrations.CreateModel(
+            name='PostActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Година')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Перегляди')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Коментарі')),
+                ('likes', models.PositiveIntegerField(default=0, verbose_name='Лайки')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='main.post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Активність поста',
+                'verbose_name_plural': 'Активність постів',
+                'indexes': [models.Index(fields=['hour'], name='post_activity_hour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'hour'), name='unique_post_activity_hour')],
+            },
+        ),
+    ]
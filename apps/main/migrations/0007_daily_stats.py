@@ -0,0 +1,61 @@
+# Generated by Django 5.2.10 on 2026-10-19 03:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_post_trending_score_postactivity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Перегляди')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='main.category', verbose_name='Категорія')),
+            ],
+            options={
+                'verbose_name': 'Денна статистика категорії',
+                'verbose_name_plural': 'Денна статистика категорій',
+                'ordering': ['-day'],
+                'constraints': [models.UniqueConstraint(fields=('category', 'day'), name='unique_category_daily_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Перегляди')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='main.post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Денна статистика поста',
+                'verbose_name_plural': 'Денна статистика постів',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='post_daily_stats_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'day'), name='unique_post_daily_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReferrerDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('referrer', models.CharField(blank=True, max_length=100, verbose_name='Джерело')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Перегляди')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='referrer_stats', to='main.post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Денна статистика джерел',
+                'verbose_name_plural': 'Денна статистика джерел',
+                'ordering': ['-day', '-views'],
+                'constraints': [models.UniqueConstraint(fields=('post', 'day', 'referrer'), name='unique_referrer_daily_stats')],
+            },
+        ),
+    ]
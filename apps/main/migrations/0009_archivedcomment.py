@@ -0,0 +1,49 @@
+# Generated by Django 5.2.10 on 2026-10-19 03:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_created_at_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('body', models.TextField(verbose_name='Текст коментаря')),
+                ('created_at', models.DateTimeField(verbose_name='Дата створення')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата оновлення')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архівування')),
+            ],
+            options={
+                'verbose_name': 'Архівний коментар',
+                'verbose_name_plural': 'Архівні коментарі',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created_at', '-id'], name='main_commen_post_id_cbabc2_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to='main.post', verbose_name='Пост'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['post', '-created_at', '-id'], name='main_archiv_post_id_985116_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.10 on 2026-10-19 03:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_archivedcomment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата створення')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.comment', verbose_name='Коментар')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Отримувач')),
+            ],
+            options={
+                'verbose_name': 'Сповіщення про коментар',
+                'verbose_name_plural': 'Сповіщення про коментарі',
+                'indexes': [models.Index(fields=['recipient', 'id'], name='main_commen_recipie_6b2d51_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.10 on 2026-10-19 03:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_archive_counts(apps, schema_editor):
+    """Заповнює лічильники навігації архіву за існуючими постами"""
+    Post = apps.get_model('main', 'Post')
+    PostMonthCount = apps.get_model('main', 'PostMonthCount')
+    PostAuthorCount = apps.get_model('main', 'PostAuthorCount')
+
+    months = {}
+    authors = {}
+    for created_at, author_id in Post.objects.order_by().values_list('created_at', 'author_id').iterator():
+        local = timezone.localtime(created_at) if timezone.is_aware(created_at) else created_at
+        months[(local.year, local.month)] = months.get((local.year, local.month), 0) + 1
+        authors[author_id] = authors.get(author_id, 0) + 1
+
+    PostMonthCount.objects.bulk_create(
+        PostMonthCount(year=year, month=month, count=count) for (year, month), count in months.items()
+    )
+    PostAuthorCount.objects.bulk_create(
+        PostAuthorCount(author_id=author_id, count=count) for author_id, count in authors.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_commentnotification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostAuthorCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0, verbose_name='Кількість постів')),
+            ],
+            options={
+                'verbose_name': 'Постів автора',
+                'verbose_name_plural': 'Постів за авторами',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostMonthCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Рік')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Місяць')),
+                ('count', models.IntegerField(default=0, verbose_name='Кількість постів')),
+            ],
+            options={
+                'verbose_name': 'Постів за місяць',
+                'verbose_name_plural': 'Постів за місяцями',
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='main_post_author__43cd58_idx'),
+        ),
+        migrations.AddField(
+            model_name='postauthorcount',
+            name='author',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddConstraint(
+            model_name='postmonthcount',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='unique_post_month_count'),
+        ),
+        migrations.RunPython(fill_archive_counts, migrations.RunPython.noop),
+    ]
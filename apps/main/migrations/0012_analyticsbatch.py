@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-19 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_archive_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Файл')),
+                ('processed_at', models.DateTimeField(auto_now_add=True, verbose_name='Оброблено')),
+            ],
+            options={
+                'verbose_name': 'Оброблений файл аналітики',
+                'verbose_name_plural': 'Оброблені файли аналітики',
+            },
+        ),
+    ]
@@ -1,8 +1,11 @@
+from datetime import date
+
 from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.urls import reverse
-import os
-from django.db.models.signals import post_delete, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
 
@@ -27,16 +30,18 @@ class Post(models.Model):
   slug = models.SlugField(max_length=100, unique=True, verbose_name="Слаг")
   image = models.ImageField(upload_to="posts/%Y/%m/%d/", blank=True, verbose_name="Зображення")
   content = models.TextField(verbose_name="Контент")
-  created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата створення")
+  created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Дата створення")
   updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата оновлення")
   likes = models.IntegerField(default=0, verbose_name="Лайки")
   views = models.IntegerField(default=0, verbose_name="Перегляди")
+  trending_score = models.FloatField(default=0, db_index=True, editable=False, verbose_name="Рейтинг трендовості")
   author = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Автор")
 
   class Meta:
       ordering = ["-created_at"]
       verbose_name = "Пост"
       verbose_name_plural = "Пости"
+      indexes = [models.Index(fields=["author", "-created_at", "-id"])]
 
   def __str__(self):
       return f" {self.title} - { self.created_at }"
@@ -46,38 +51,366 @@ class Post(models.Model):
 
 @receiver(post_delete, sender=Post)
 def delete_post_image(sender, instance, **kwargs):
-    """Видаляє файл зображення при видаленні поста"""
-    if instance.image:
-        if os.path.isfile(instance.image.path):
-            os.remove(instance.image.path)
+    """Звільняє файл зображення при видаленні поста (файл може бути спільним)"""
+    from .storage import release_on_commit
+    release_on_commit(instance.image.name)
 
 @receiver(pre_save, sender=Post)
+def remember_old_image(sender, instance, **kwargs):
+    """Запам'ятовує попереднє зображення і автора, щоб обробити їх зміну після збереження"""
+    instance._previous_image = instance._previous_author_id = None
+    if instance.pk:
+        previous = Post.objects.filter(pk=instance.pk).values_list("image", "author_id").first()
+        if previous:
+            instance._previous_image, instance._previous_author_id = previous
+
+@receiver(post_save, sender=Post)
 def delete_old_image_on_update(sender, instance, **kwargs):
-    """Видаляє старе зображення при оновленні поста новим зображенням"""
-    if not instance.pk:
-        return False
-    
-    try:
-        old_image = Post.objects.get(pk=instance.pk).image
-    except Post.DoesNotExist:
-        return False
-    
-    new_image = instance.image
-    if old_image and old_image != new_image:
-        if os.path.isfile(old_image.path):
-            os.remove(old_image.path)
+    """Звільняє старе зображення, якщо пост отримав нове"""
+    previous = getattr(instance, "_previous_image", None)
+    if previous and previous != instance.image.name:
+        from .storage import release_on_commit
+        release_on_commit(previous)
+
+@receiver([post_save, post_delete], sender=Post)
+def bump_posts_generation(sender, instance, update_fields=None, **kwargs):
+    """Робить застарілими кеші, що залежать від постів"""
+    if update_fields and set(update_fields) <= {"views", "likes", "trending_score"}:
+        return
+
+    from .invalidation import POSTS, bump_on_commit
+    # Після коміту: інші воркери не повинні перебудувати кеш зі старих даних
+    bump_on_commit(POSTS)
+
+
+@receiver(post_save, sender=Post)
+def count_archive_post(sender, instance, created, raw=False, **kwargs):
+    """Оновлює лічильники навігації архіву (місяць, автор)"""
+    from . import archive
+    if created:
+        archive.post_added(instance.created_at, instance.author_id)
+    elif not raw:
+        previous_author_id = getattr(instance, "_previous_author_id", None)
+        if previous_author_id not in (None, instance.author_id):
+            archive.author_changed(previous_author_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_archive_post(sender, instance, **kwargs):
+    from . import archive
+    archive.post_removed(instance.created_at, instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def bump_categories_generation(sender, instance, **kwargs):
+    from .invalidation import CATEGORIES, bump_on_commit
+    bump_on_commit(CATEGORIES)
+
+
+@receiver(post_save, sender=Post)
+def refresh_related_posts(sender, instance, update_fields=None, **kwargs):
+    """Оновлює схожі пости, якщо змінився заголовок або контент"""
+    if update_fields and not {"title", "content"} & set(update_fields):
+        return
+
+    from .related import refresh_post, schedule
+    transaction.on_commit(lambda: schedule(refresh_post, instance.pk))
+
+
+@receiver(pre_delete, sender=Post)
+def remember_related_owners(sender, instance, **kwargs):
+    """Пости, що посилаються на видалений: CASCADE забере їхній зв'язок, місце треба заповнити"""
+    instance._related_owners = list(
+        RelatedPost.objects.filter(related=instance).values_list("post_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Post)
+def refill_related_posts(sender, instance, **kwargs):
+    owners = getattr(instance, "_related_owners", None)
+    if owners:
+        from .related import refill, schedule
+        transaction.on_commit(lambda: schedule(refill, owners))
+
+
+@receiver(post_save, sender=Post)
+def warm_published_post(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Прогріває сторінку поста і списки після публікації чи редагування"""
+    if raw or (update_fields and set(update_fields) <= {"views", "likes", "trending_score"}):
+        return
+
+    from .cache_warmer import warm_after_publish
+    transaction.on_commit(lambda: warm_after_publish(instance.pk))
+
+
+class PostMonthCount(models.Model):
+    """Кількість постів за місяць для навігації архіву (оновлюється сигналами Post)"""
+    year = models.PositiveSmallIntegerField(verbose_name="Рік")
+    month = models.PositiveSmallIntegerField(verbose_name="Місяць")
+    count = models.IntegerField(default=0, verbose_name="Кількість постів")
+
+    class Meta:
+        ordering = ["-year", "-month"]
+        verbose_name = "Постів за місяць"
+        verbose_name_plural = "Постів за місяцями"
+        constraints = [
+            models.UniqueConstraint(fields=["year", "month"], name="unique_post_month_count"),
+        ]
+
+    def __str__(self):
+        return f"{self.month:02d}.{self.year}: {self.count}"
+
+    @property
+    def first_day(self):
+        return date(self.year, self.month, 1)
+
+    def get_absolute_url(self):
+        return reverse("main:archive_month", args=[self.year, self.month])
+
+
+class PostAuthorCount(models.Model):
+    """Кількість постів автора для навігації архіву (оновлюється сигналами Post)"""
+    author = models.OneToOneField(User, on_delete=models.CASCADE, related_name='+', verbose_name="Автор")
+    count = models.IntegerField(default=0, verbose_name="Кількість постів")
+
+    class Meta:
+        verbose_name = "Постів автора"
+        verbose_name_plural = "Постів за авторами"
+
+    def __str__(self):
+        return f"{self.author_id}: {self.count}"
+
+    def get_absolute_url(self):
+        return reverse("main:author_posts", args=[self.author.username])
+
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="related_links", verbose_name="Пост")
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+", verbose_name="Схожий пост")
+    score = models.FloatField(verbose_name="Схожість")
+
+    class Meta:
+        ordering = ["post", "-score"]
+        verbose_name = "Схожий пост"
+        verbose_name_plural = "Схожі пости"
+        constraints = [
+            models.UniqueConstraint(fields=["post", "related"], name="unique_related_post"),
+        ]
+        indexes = [
+            models.Index(fields=["post", "-score"], name="related_post_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} → {self.related_id} ({self.score:.3f})"
+
+
+class PostActivity(models.Model):
+    """Погодинний кошик активності поста для розрахунку трендів"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="activity", verbose_name="Пост")
+    hour = models.DateTimeField(verbose_name="Година")
+    views = models.PositiveIntegerField(default=0, verbose_name="Перегляди")
+    comments = models.PositiveIntegerField(default=0, verbose_name="Коментарі")
+    likes = models.PositiveIntegerField(default=0, verbose_name="Лайки")
+
+    class Meta:
+        verbose_name = "Активність поста"
+        verbose_name_plural = "Активність постів"
+        constraints = [
+            models.UniqueConstraint(fields=["post", "hour"], name="unique_post_activity_hour"),
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="post_activity_hour_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} @ {self.hour:%d.%m.%Y %H:00}"
+
+
+class PostDailyStats(models.Model):
+    """Денне зведення переглядів поста (заповнює команда rollup_analytics)"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="daily_stats", verbose_name="Пост")
+    day = models.DateField(verbose_name="День")
+    views = models.PositiveIntegerField(default=0, verbose_name="Перегляди")
+
+    class Meta:
+        ordering = ["-day"]
+        verbose_name = "Денна статистика поста"
+        verbose_name_plural = "Денна статистика постів"
+        constraints = [
+            models.UniqueConstraint(fields=["post", "day"], name="unique_post_daily_stats"),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="post_daily_stats_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} @ {self.day}: {self.views}"
+
+
+class ReferrerDailyStats(models.Model):
+    """Денне зведення переглядів поста за джерелом переходу"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="referrer_stats", verbose_name="Пост")
+    day = models.DateField(verbose_name="День")
+    referrer = models.CharField(max_length=100, blank=True, verbose_name="Джерело")
+    views = models.PositiveIntegerField(default=0, verbose_name="Перегляди")
+
+    class Meta:
+        ordering = ["-day", "-views"]
+        verbose_name = "Денна статистика джерел"
+        verbose_name_plural = "Денна статистика джерел"
+        constraints = [
+            models.UniqueConstraint(fields=["post", "day", "referrer"], name="unique_referrer_daily_stats"),
+        ]
+
+    def __str__(self):
+        return f"{self.referrer or 'direct'} → {self.post_id} @ {self.day}: {self.views}"
+
+
+class CategoryDailyStats(models.Model):
+    """Денне зведення переглядів постів категорії"""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="daily_stats", verbose_name="Категорія")
+    day = models.DateField(verbose_name="День")
+    views = models.PositiveIntegerField(default=0, verbose_name="Перегляди")
+
+    class Meta:
+        ordering = ["-day"]
+        verbose_name = "Денна статистика категорії"
+        verbose_name_plural = "Денна статистика категорій"
+        constraints = [
+            models.UniqueConstraint(fields=["category", "day"], name="unique_category_daily_stats"),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} @ {self.day}: {self.views}"
+
+
+class AnalyticsBatch(models.Model):
+    """
+    Файл логу переглядів, уже агрегований rollup_analytics. Записується в
+    тій самій транзакції, що й лічильники, тож файл, який не встигли
+    видалити після коміту, наступний запуск не порахує вдруге.
+    """
+    name = models.CharField(max_length=100, unique=True, verbose_name="Файл")
+    processed_at = models.DateTimeField(auto_now_add=True, verbose_name="Оброблено")
+
+    class Meta:
+        verbose_name = "Оброблений файл аналітики"
+        verbose_name_plural = "Оброблені файли аналітики"
+
+    def __str__(self):
+        return self.name
+
+
+class CommentManager(models.Manager):
+    """
+    Коментарі поста сторінками від новіших до старших. Старі коментарі
+    переносяться командою archive_comments до ArchivedComment; коли в
+    основній таблиці їх не вистачає на сторінку, решта береться з архіву.
+    """
+
+    def page_for_post(self, post, before=None, limit=None):
+        """
+        Повертає (коментарі, чи є ще старіші). before - курсор
+        (created_at, id) останнього показаного коментаря.
+        """
+        limit = limit or settings.COMMENTS_PAGE_SIZE
+
+        def older(queryset):
+            queryset = queryset.filter(post=post)
+            if before:
+                created_at, comment_id = before
+                queryset = queryset.filter(
+                    models.Q(created_at__lt=created_at) | models.Q(created_at=created_at, id__lt=comment_id)
+                )
+            return queryset.select_related("author").order_by("-created_at", "-id")
+
+        # Архівні коментарі завжди старші за гарячі, тож сторінки просто продовжуються в архіві
+        comments = list(older(self.get_queryset())[:limit + 1])
+        if len(comments) <= limit:
+            comments += older(ArchivedComment.objects.all())[:limit + 1 - len(comments)]
+        return comments[:limit], len(comments) > limit
+
+    def count_for_post(self, post):
+        return self.filter(post=post).count() + ArchivedComment.objects.filter(post=post).count()
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments', verbose_name="Пост")
     author = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Автор")
     body = models.TextField(verbose_name="Текст коментаря")
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата створення")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Дата створення")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата оновлення")
 
     class Meta:
         ordering = ["-created_at"]
         verbose_name = "Коментар"
         verbose_name_plural = "Коментарі"
+        indexes = [models.Index(fields=["post", "-created_at", "-id"])]
+
+    objects = CommentManager()
+
+    is_archived = False
+
+    def __str__(self):
+        return f"Коментар від {self.author.username} до «{self.post.title}»"
+
+
+class ArchivedComment(models.Model):
+    """Старий коментар, перенесений з Comment (id зберігається)"""
+    id = models.BigIntegerField(primary_key=True)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='archived_comments', verbose_name="Пост")
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', verbose_name="Автор")
+    body = models.TextField(verbose_name="Текст коментаря")
+    created_at = models.DateTimeField(verbose_name="Дата створення")
+    updated_at = models.DateTimeField(verbose_name="Дата оновлення")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата архівування")
+
+    is_archived = True
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Архівний коментар"
+        verbose_name_plural = "Архівні коментарі"
+        indexes = [models.Index(fields=["post", "-created_at", "-id"])]
 
     def __str__(self):
-        return f"Коментар від {self.author.username} до «{self.post.title}»"
\ No newline at end of file
+        return f"Архівний коментар від {self.author.username} до «{self.post.title}»"
+
+
+class CommentNotification(models.Model):
+    """
+    Новий коментар, про який ще не повідомлено автора поста. Рядки
+    видаляються командою send_comment_digests після надсилання дайджесту.
+    """
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', verbose_name="Отримувач")
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='+', verbose_name="Коментар")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата створення")
+
+    class Meta:
+        verbose_name = "Сповіщення про коментар"
+        verbose_name_plural = "Сповіщення про коментарі"
+        indexes = [models.Index(fields=["recipient", "id"])]
+
+    def __str__(self):
+        return f"Сповіщення для {self.recipient_id} про коментар {self.comment_id}"
+
+
+@receiver(post_save, sender=Comment)
+def queue_comment_notification(sender, instance, created, raw=False, **kwargs):
+    """Ставить новий коментар у чергу дайджесту автора поста (крім власних коментарів автора)"""
+    if created and not raw and instance.author_id != instance.post.author_id:
+        CommentNotification.objects.create(recipient_id=instance.post.author_id, comment=instance)
+
+
+@receiver(post_save, sender=Comment)
+def record_comment_activity(sender, instance, created, **kwargs):
+    """Враховує новий коментар у трендах"""
+    if created:
+        from .trending import record_activity
+        record_activity(instance.post_id, comments=1)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def bump_comments_generation(sender, instance, **kwargs):
+    from .invalidation import COMMENTS, bump_on_commit
+    bump_on_commit(COMMENTS)
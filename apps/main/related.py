@@ -0,0 +1,285 @@
+"""
+Рушій схожих постів.
+
+Кожен пост перетворюється на TF-IDF вектор зі слів заголовка та контенту,
+схожість рахується як косинусна відстань. Для кожного поста зберігаємо
+top-K сусідів у таблиці RelatedPost, тож сторінка поста лише читає K рядків
+за індексом і не робить жодних обчислень під час запиту. Після правки чи
+видалення поста сусіди оновлюються у фоновому потоці (schedule()) і лише
+для постів, яких зміна стосується.
+"""
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from heapq import nlargest
+
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 8
+
+# Заголовок важить більше за контент
+TITLE_WEIGHT = 3
+
+TOKEN_RE = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def tokenize(text):
+    """Розбиває текст на слова (без HTML, у нижньому регістрі)"""
+    return TOKEN_RE.findall(TAG_RE.sub(" ", text or "").lower())
+
+
+def term_counts(title, content):
+    """Частоти слів поста з урахуванням ваги заголовка"""
+    counts = Counter(tokenize(content))
+    for token in tokenize(title):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+def build_vectors(documents):
+    """
+    Будує нормовані TF-IDF вектори.
+
+    documents: {post_id: Counter}
+    Повертає {post_id: {term: weight}} з одиничною довжиною вектора.
+    """
+    total = len(documents)
+    df = Counter()
+    for counts in documents.values():
+        df.update(counts.keys())
+
+    idf = {term: math.log((1 + total) / (1 + freq)) + 1 for term, freq in df.items()}
+
+    vectors = {}
+    for post_id, counts in documents.items():
+        vector = {term: (1 + math.log(tf)) * idf[term] for term, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        if norm:
+            vectors[post_id] = {term: w / norm for term, w in vector.items()}
+    return vectors
+
+
+def similarity_scores(vector, index, exclude=None):
+    """Скалярний добуток вектора з усіма документами через інвертований індекс"""
+    scores = defaultdict(float)
+    for term, weight in vector.items():
+        for other_id, other_weight in index.get(term, ()):
+            if other_id != exclude:
+                scores[other_id] += weight * other_weight
+    return scores
+
+
+def inverted_index(vectors):
+    index = defaultdict(list)
+    for post_id, vector in vectors.items():
+        for term, weight in vector.items():
+            index[term].append((post_id, weight))
+    return index
+
+
+def load_vectors():
+    """Завантажує тексти всіх постів одним запитом і рахує вектори"""
+    from .models import Post
+
+    documents = {
+        post_id: term_counts(title, content)
+        for post_id, title, content in Post.objects.values_list("id", "title", "content")
+    }
+    return build_vectors(documents)
+
+
+def top_neighbours(scores, k):
+    return nlargest(k, ((score, other_id) for other_id, score in scores.items() if score > 0))
+
+
+def rebuild_all(k=DEFAULT_TOP_K):
+    """
+    Повністю перебудовує таблицю RelatedPost.
+
+    Схожості рахуються розрідженим множенням матриць через інвертований
+    індекс: пари постів без спільних слів взагалі не розглядаються.
+    """
+    from .models import RelatedPost
+
+    vectors = load_vectors()
+    index = inverted_index(vectors)
+
+    rows = []
+    for post_id, vector in vectors.items():
+        for score, other_id in top_neighbours(similarity_scores(vector, index, exclude=post_id), k):
+            rows.append(RelatedPost(post_id=post_id, related_id=other_id, score=score))
+
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        RelatedPost.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+class Corpus:
+    """
+    Частоти слів усіх постів у пам'яті процесу з інвертованим індексом.
+
+    sync() звіряє лише (id, updated_at) і перечитує тексти змінених постів,
+    тож інкрементальне оновлення не токенізує весь блог на кожну правку.
+    Вектори рахуються на льоту і лише для постів зі спільними словами.
+    """
+
+    def __init__(self):
+        self.documents = {}  # post_id -> (updated_at, Counter)
+        self.df = Counter()
+        self.postings = defaultdict(set)
+
+    def sync(self):
+        from .models import Post
+
+        stamps = dict(Post.objects.values_list("id", "updated_at"))
+        for post_id in self.documents.keys() - stamps.keys():
+            self._drop(post_id)
+
+        stale = [post_id for post_id, updated_at in stamps.items() if self.documents.get(post_id, (None,))[0] != updated_at]
+        if not stale:
+            return
+        posts = Post.objects.all() if len(stale) * 2 > len(stamps) else Post.objects.filter(id__in=stale)
+        for post_id, title, content, updated_at in posts.values_list("id", "title", "content", "updated_at"):
+            if self.documents.get(post_id, (None,))[0] == updated_at:
+                continue
+            self._drop(post_id)
+            counts = term_counts(title, content)
+            self.documents[post_id] = (updated_at, counts)
+            self.df.update(counts.keys())
+            for term in counts:
+                self.postings[term].add(post_id)
+
+    def _drop(self, post_id):
+        _, counts = self.documents.pop(post_id, (None, Counter()))
+        self.df.subtract(counts.keys())
+        for term in counts:
+            self.postings[term].discard(post_id)
+            if not self.df[term]:
+                del self.df[term]
+                del self.postings[term]
+
+    def vector(self, post_id):
+        """Нормований TF-IDF вектор, як у build_vectors()"""
+        if post_id not in self.documents:
+            return {}
+        total = len(self.documents)
+        counts = self.documents[post_id][1]
+        vector = {
+            term: (1 + math.log(tf)) * (math.log((1 + total) / (1 + self.df[term])) + 1)
+            for term, tf in counts.items()
+        }
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {term: w / norm for term, w in vector.items()} if norm else {}
+
+    def scores(self, post_id):
+        """Схожість поста з кожним постом, що має хоча б одне спільне слово"""
+        vector = self.vector(post_id)
+        candidates = set().union(*(self.postings[term] for term in vector)) - {post_id}
+        scores = {}
+        for other_id in candidates:
+            other = self.vector(other_id)
+            scores[other_id] = sum(weight * other.get(term, 0) for term, weight in vector.items())
+        return scores
+
+
+_corpus = Corpus()
+_corpus_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def refresh_post(post_id, k=DEFAULT_TOP_K):
+    """
+    Інкрементально оновлює сусідів після зміни або видалення одного поста.
+
+    Перераховує top-K самого поста. Пости, що посилалися на нього,
+    отримують повністю перерахований top-K (зв'язок міг ослабнути, а
+    порожнє місце треба заповнити). Решті постів зі спільними словами
+    змінений пост додається, лише якщо тепер потрапляє в їхній top-K.
+    """
+    from .models import RelatedPost
+
+    with _corpus_lock:
+        _corpus.sync()
+        scores = _corpus.scores(post_id)
+        owners = set(RelatedPost.objects.filter(related_id=post_id).values_list("post_id", flat=True))
+
+        with transaction.atomic():
+            RelatedPost.objects.filter(post_id=post_id).delete()
+            RelatedPost.objects.filter(related_id=post_id).delete()
+
+            rows = [
+                RelatedPost(post_id=post_id, related_id=other_id, score=score)
+                for score, other_id in top_neighbours(scores, k)
+            ]
+
+            # Пости, для яких змінений пост тепер потрапляє у top-K
+            candidates = [other_id for other_id, score in scores.items() if score > 0 and other_id not in owners]
+            current = defaultdict(list)
+            for owner_id, row_id, score in RelatedPost.objects.filter(
+                post_id__in=candidates
+            ).values_list("post_id", "id", "score"):
+                current[owner_id].append((score, row_id))
+
+            weakest = []
+            for other_id in candidates:
+                existing = current[other_id]
+                if len(existing) < k:
+                    rows.append(RelatedPost(post_id=other_id, related_id=post_id, score=scores[other_id]))
+                elif scores[other_id] > min(existing)[0]:
+                    weakest.append(min(existing)[1])
+                    rows.append(RelatedPost(post_id=other_id, related_id=post_id, score=scores[other_id]))
+
+            RelatedPost.objects.filter(id__in=weakest).delete()
+            RelatedPost.objects.bulk_create(rows, batch_size=500)
+            _refill(owners, k)
+
+
+def refill(post_ids, k=DEFAULT_TOP_K):
+    """Повністю перераховує top-K вказаних постів (наприклад, після видалення їхнього сусіда)"""
+    with _corpus_lock:
+        _corpus.sync()
+        with transaction.atomic():
+            _refill(post_ids, k)
+
+
+def _refill(post_ids, k):
+    from .models import RelatedPost
+
+    post_ids = [post_id for post_id in post_ids if post_id in _corpus.documents]
+    RelatedPost.objects.filter(post_id__in=post_ids).delete()
+    RelatedPost.objects.bulk_create([
+        RelatedPost(post_id=post_id, related_id=other_id, score=score)
+        for post_id in post_ids
+        for score, other_id in top_neighbours(_corpus.scores(post_id), k)
+    ], batch_size=500)
+
+
+def _run(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Не вдалося оновити схожі пости")
+    finally:
+        # Потік пулу живе довше за запит - його з'єднання з БД закривається одразу
+        connections.close_all()
+
+
+def schedule(func, *args):
+    """
+    Виконує refresh_post()/refill() у фоновому потоці, а не у відповіді на запит.
+    Один потік: оновлення не конкурують між собою за корпус і таблицю.
+    Втрачене при перезапуску оновлення виправить rebuild_related.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="related-posts")
+    _pool.submit(_run, func, *args)
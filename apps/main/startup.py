@@ -0,0 +1,108 @@
+"""
+Прогрів воркера під час старту.
+
+Новий WSGI-воркер інакше платить за компіляцію шаблонів, побудову
+URL-резолвера та перше з'єднання з БД під час першого запиту користувача.
+preload() викликається з MainConfig.ready() і лише імпортує модулі;
+warmup() викликається з config/wsgi.py, коли всі застосунки вже готові.
+
+З gunicorn --preload config/wsgi.py імпортує майстер, тож з'єднання з БД
+з прогріву не можна передавати воркерам через fork(): кілька процесів
+писали б в один сокет чи дескриптор SQLite. Перед fork() з'єднання
+закриваються, а кожен воркер відкриває власне одразу після нього.
+"""
+import importlib
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+# Шаблони, які рендеряться на кожній популярній сторінці
+HOT_TEMPLATES = [
+    "base.html",
+    "main/post_list.html",
+    "main/post_details.html",
+    "main/components/form.html",
+    "main/components/pagination-v2.html",
+    "accounts/login.html",
+    "contact/contact_form.html",
+]
+
+PRELOAD_MODULES = [
+    "apps.main.views",
+    "apps.main.templatetags.blog_tags",
+    "apps.main.templatetags.blog_filters",
+]
+
+
+def preload():
+    """Імпортує модулі, потрібні першому запиту (без звернень до БД)"""
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+
+def compile_templates():
+    # Cached loader зберігає скомпільовані шаблони в пам'яті процесу
+    for name in HOT_TEMPLATES:
+        get_template(name)
+
+
+def prime_urls():
+    get_resolver().url_patterns
+    reverse("main:post_list")
+
+
+def open_connections():
+    # Має сенс лише з CONN_MAX_AGE > 0, інакше з'єднання закриється після першого запиту
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+def close_connections_before_fork():
+    connections.close_all()
+
+
+def reopen_connections_after_fork():
+    try:
+        open_connections()
+    except Exception:
+        logger.exception("Не вдалося відкрити з'єднання з БД після fork()")
+
+
+_fork_hooks_registered = False
+
+
+def register_fork_hooks():
+    global _fork_hooks_registered
+    if not _fork_hooks_registered:
+        os.register_at_fork(
+            before=close_connections_before_fork, after_in_child=reopen_connections_after_fork,
+        )
+        _fork_hooks_registered = True
+
+
+def warmup():
+    """Виконує всі кроки прогріву і повертає їх тривалість у мілісекундах"""
+    timings = {}
+    for step in (preload, compile_templates, prime_urls, open_connections):
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            # Прогрів не повинен заважати старту воркера
+            logger.exception("Помилка прогріву на кроці %s", step.__name__)
+        timings[step.__name__] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def warmup_if_enabled():
+    if settings.STARTUP_WARMUP:
+        register_fork_hooks()
+        timings = warmup()
+        logger.info("Прогрів воркера: %s", ", ".join(f"{k}={v:.1f}ms" for k, v in timings.items()))
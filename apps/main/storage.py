@@ -0,0 +1,132 @@
+"""
+Контентно-адресоване сховище медіафайлів.
+
+Файл зберігається під іменем blobs/<ab>/<sha256><.ext>, тож однакові
+зображення (одна обкладинка в кількох постах, однаковий аватар)
+записуються на диск один раз. Оскільки файл може використовуватися
+кількома записами, видаляти його можна лише через release(): він
+рахує посилання в усіх полях REFERENCING_FIELDS і прибирає файл,
+коли їх не лишилося. Масове прибирання (cleanup_media) збирає всі
+посилання один раз через referenced_names() і передає їх у release().
+"""
+import hashlib
+import os
+import tempfile
+import time
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import router, transaction
+
+BLOB_DIR = "blobs"
+
+# Поля, що можуть посилатися на спільні файли
+REFERENCING_FIELDS = [
+    ("main.Post", "image"),
+    ("accounts.Profile", "avatar"),
+    ("accounts.Profile", "avatar_thumbnail"),
+]
+
+# Файл, який щойно використали повторно, не видаляється ще стільки секунд:
+# запис, що на нього посилається, може бути ще не збережений
+REUSE_GRACE_SECONDS = 60
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Ім'я визначається вмістом у _save(), суфікси для унікальності не потрібні
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+
+        extension = os.path.splitext(name)[1].lower()
+        name = f"{BLOB_DIR}/{digest[:2]}/{digest}{extension}"
+        path = self.path(name)
+
+        if os.path.exists(path):
+            # Такий вміст уже є - нічого не пишемо, лише позначаємо використання
+            os.utime(path)
+            return name
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        try:
+            content.seek(0)
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in content.chunks():
+                    tmp.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            # Атомарна заміна: паралельне завантаження того ж вмісту не бачить недописаний файл
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name
+
+
+def reference_count(name):
+    """Скільки записів у REFERENCING_FIELDS посилаються на файл"""
+    count = 0
+    for model_label, field_name in REFERENCING_FIELDS:
+        model = apps.get_model(model_label)
+        # Лише з основної БД: репліка може відставати і не бачити нового посилання
+        manager = model._default_manager.db_manager(router.db_for_write(model))
+        count += manager.filter(**{field_name: name}).count()
+    return count
+
+
+def referenced_names(names=None, batch_size=500):
+    """
+    Множина імен файлів, на які посилається хоч один запис у REFERENCING_FIELDS.
+    Без names - один прохід по кожному полю; з names - лише серед цих імен
+    (пакетами, щоб не впертися в ліміт параметрів SQLite).
+    """
+    referenced = set()
+    names = None if names is None else list(names)
+    for model_label, field_name in REFERENCING_FIELDS:
+        model = apps.get_model(model_label)
+        # Лише з основної БД: репліка може відставати і не бачити нового посилання
+        queryset = model._default_manager.db_manager(router.db_for_write(model)).exclude(**{field_name: ""})
+        if names is None:
+            referenced.update(queryset.filter(**{f"{field_name}__isnull": False}).values_list(field_name, flat=True))
+            continue
+        for start in range(0, len(names), batch_size):
+            referenced.update(
+                queryset.filter(**{f"{field_name}__in": names[start:start + batch_size]})
+                .values_list(field_name, flat=True)
+            )
+    return referenced
+
+
+def release(name, storage=None, referenced=None):
+    """
+    Видаляє файл, якщо на нього більше ніхто не посилається. referenced -
+    заздалегідь зібрана множина з referenced_names(), щоб масове прибирання
+    не рахувало посилання окремими запитами для кожного файлу.
+    """
+    if not name:
+        return False
+    storage = storage or default_storage
+    if name in referenced if referenced is not None else reference_count(name):
+        return False
+    try:
+        if time.time() - os.path.getmtime(storage.path(name)) < REUSE_GRACE_SECONDS:
+            return False
+    except (OSError, NotImplementedError):
+        pass
+    storage.delete(name)
+    return True
+
+
+def release_on_commit(*names):
+    """Відкладає release() до коміту транзакції, щоб відкат не залишив записи без файлів"""
+    for name in filter(None, names):
+        transaction.on_commit(lambda name=name: release(name))
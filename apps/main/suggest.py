@@ -0,0 +1,122 @@
+"""
+Підказки пошуку «на льоту».
+
+Заголовки постів і назви категорій зберігаються в пам'яті процесу як
+відсортований масив суфіксів; пошук за префіксом - це bisect, тож запити
+на кожне натискання клавіші не доходять до БД. Індекс перебудовується
+лише тоді, коли змінюється покоління posts/categories.
+"""
+import re
+import threading
+from bisect import bisect_left
+
+from django.urls import reverse
+
+from config.metrics import cache_result
+
+from . import invalidation
+
+SUGGEST_LIMIT = 8
+
+# Скільки збігів переглядати перед ранжуванням (обмежує час для коротких префіксів)
+SCAN_LIMIT = 200
+
+CATEGORY = "category"
+POST = "post"
+
+NORMALIZE_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize(text):
+    return " ".join(NORMALIZE_RE.sub(" ", text.casefold()).split())
+
+
+class PrefixIndex:
+    """
+    Компактний префіксний індекс (масив суфіксів).
+
+    Для кожного запису індексуються всі «хвости» назви, що починаються
+    з початку слова, тож «війн» знайде і «Війна в Україні», і «Новини про війну».
+    Зберігаються лише пари (номер запису, зсув), а не копії рядків.
+    """
+
+    def __init__(self, entries):
+        # entries: список (kind, title, url, rank)
+        self.entries = entries
+        self.titles = [normalize(title) for _, title, _, _ in entries]
+        suffixes = []
+        for entry_id, title in enumerate(self.titles):
+            offset = 0
+            for word in title.split(" "):
+                suffixes.append((entry_id, offset))
+                offset += len(word) + 1
+        suffixes.sort(key=self._suffix)
+        self.suffixes = suffixes
+
+    def _suffix(self, item):
+        entry_id, offset = item
+        return self.titles[entry_id][offset:]
+
+    def search(self, query, limit=SUGGEST_LIMIT):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        found = {}
+        position = bisect_left(self.suffixes, prefix, key=self._suffix)
+        while position < len(self.suffixes) and len(found) < SCAN_LIMIT:
+            entry_id, offset = self.suffixes[position]
+            if not self.titles[entry_id].startswith(prefix, offset):
+                break
+            # Збіг з початку назви важливіший за збіг усередині
+            found[entry_id] = found.get(entry_id, False) or offset == 0
+            position += 1
+
+        ranked = sorted(
+            found.items(),
+            key=lambda item: (self.entries[item[0]][0] != CATEGORY, not item[1], -self.entries[item[0]][3]),
+        )
+        return [self.entries[entry_id] for entry_id, _ in ranked[:limit]]
+
+
+_index = None
+_index_generation = None
+_lock = threading.Lock()
+
+
+def build_index():
+    from .models import Category, Post
+
+    entries = [
+        (CATEGORY, name, reverse("main:post_list_by_category", args=[slug]), 0)
+        for name, slug in Category.objects.values_list("name", "slug")
+    ]
+    entries += [
+        (POST, title, reverse("main:post_detail", args=[post_id, slug]), views)
+        for post_id, slug, title, views in Post.objects.values_list("id", "slug", "title", "views")
+    ]
+    return PrefixIndex(entries)
+
+
+def get_index():
+    """Повертає індекс, перебудовуючи його лише після зміни постів або категорій"""
+    global _index, _index_generation
+
+    current = (invalidation.generation(invalidation.POSTS), invalidation.generation(invalidation.CATEGORIES))
+    if _index is not None and _index_generation == current:
+        cache_result("suggest_index", hits=1)
+        return _index
+
+    with _lock:
+        if _index is None or _index_generation != current:
+            cache_result("suggest_index", misses=1)
+            _index = build_index()
+            _index_generation = current
+    return _index
+
+
+def suggest(query, limit=SUGGEST_LIMIT):
+    return [
+        {"type": kind, "title": title, "url": url}
+        for kind, title, url, _ in get_index().search(query, limit)
+    ]
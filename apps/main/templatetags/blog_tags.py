@@ -1,9 +1,20 @@
 from django import template
-from apps.main.models import Post, Category
-from django.db.models import Count
+from apps.main.models import Post, Category, RelatedPost
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from apps.main import invalidation
+from config.metrics import cache_result
 
 register = template.Library()
 
+# Список категорій у меню рендериться на кожній сторінці; кеш процесу
+# скидається, щойно будь-який воркер змінить пости або категорії
+_categories_cache = invalidation.local_cache(invalidation.POSTS, invalidation.CATEGORIES)
+
 
 # ТЕГ 1: Кількість постів у категорії
 @register.simple_tag
@@ -38,17 +49,37 @@ def get_popular_posts(count=5):
     return Post.objects.all().order_by('-views')[:count]
 
 
+# ТЕГ 3.1: Трендові пости
+@register.simple_tag
+def get_trending_posts(count=5):
+    """
+    Повертає пости з найвищим рейтингом трендовості
+    (з урахуванням згасання активності з часом)
+    
+    Використання: {% get_trending_posts 5 as trending_posts %}
+    """
+    return Post.objects.filter(trending_score__gt=0).order_by('-trending_score')[:count]
+
+
 # ТЕГ 4: Категорії з кількістю постів
 @register.simple_tag
 def get_categories_with_count():
     """
     Повертає всі категорії з кількістю постів у кожній
+    (з кешу процесу, див. apps/main/invalidation.py)
     
     Використання: {% get_categories_with_count as categories %}
     """
-    return Category.objects.annotate(
-        posts_count=Count('post')
-    ).filter(posts_count__gt=0)
+    categories = _categories_cache.get('with_count')
+    if categories is not None:
+        cache_result('categories', hits=1)
+        return categories
+
+    cache_result('categories', misses=1)
+    categories = _categories_cache['with_count'] = list(
+        Category.objects.annotate(posts_count=Count('post')).filter(posts_count__gt=0)
+    )
+    return categories
 
 
 # ТЕГ 5: Загальна кількість постів
@@ -91,14 +122,20 @@ def get_author_posts(author, exclude_post_id=None, count=5):
     return posts.order_by('-created_at')[:count]
 
 
-# ТЕГ 8: Схожі пости (за категорією)
+# ТЕГ 8: Схожі пости (за змістом)
 @register.simple_tag
 def get_related_posts(post, count=4):
     """
-    Повертає схожі пости з тієї ж категорії
+    Повертає схожі пости з попередньо обчисленої таблиці RelatedPost.
+    Якщо таблиця ще не побудована - пости з тієї ж категорії.
     
     Використання: {% get_related_posts post 4 as related_posts %}
     """
+    links = RelatedPost.objects.filter(post=post).select_related('related')[:count]
+    related = [link.related for link in links]
+    if related:
+        return related
+
     if not post.category:
         return Post.objects.none()
     
@@ -128,3 +165,35 @@ def get_random_post():
     """
     return Post.objects.order_by('?').first()
 
+
+# ТЕГ 11: Картки постів з кешу фрагментів
+def post_card_cache_key(post, variant):
+    return f"post_card:{post.id}:{post.updated_at.timestamp():.6f}:{variant}"
+
+
+@register.simple_tag
+def render_post_cards(posts, variant='list'):
+    """
+    Повертає HTML карток постів. Готові картки беруться з кешу одним
+    get_many, рендеряться лише відсутні.
+    Ключ кешу - (post.id, updated_at, variant), тож редагування поста
+    одразу дає нову картку; лічильник переглядів оновлюється по таймауту.
+    
+    Використання: {% render_post_cards posts 'list' as cards %}
+    """
+    posts = list(posts)
+    keys = {post.id: post_card_cache_key(post, variant) for post in posts}
+    cached = cache.get_many(keys.values())
+
+    missing = [post for post in posts if keys[post.id] not in cached]
+    cache_result('post_card', hits=len(posts) - len(missing), misses=len(missing))
+    if missing:
+        prefetch_related_objects(missing, 'author')
+        rendered = {
+            keys[post.id]: render_to_string('main/components/post_card.html', {'post': post, 'variant': variant})
+            for post in missing
+        }
+        cache.set_many(rendered, timeout=settings.POST_CARD_CACHE_TIMEOUT)
+        cached.update(rendered)
+
+    return [mark_safe(cached[keys[post.id]]) for post in posts]
@@ -1,3 +1,654 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import smtplib
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
+from PIL import Image
+
+from apps.main import analytics, related, startup
+from apps.main.cache_warmer import PrerenderMiddleware
+from apps.main.trending import record_activity, recompute_scores
+from apps.main.uploads import MaxSizeUploadHandler, ValidatedImageField, validate_image_upload
+from config import db_router, metrics
+from config.db_router import (
+    PIN_COOKIE, PRIMARY_ALIAS, REPLICA_ALIAS, PrimaryReplicaRouter, ReplicaPinningMiddleware,
+)
+from config.staticfiles import CompressedManifestStaticFilesStorage
+
+from .models import ArchivedComment, Category, Comment, CommentNotification, Post, PostDailyStats, RelatedPost
+from .views import SORT_OPTIONS
+
+REPLICA_ROUTERS = ["config.db_router.PrimaryReplicaRouter"]
+
+
+@contextmanager
+def replica_reads():
+    """Маршрутизація як усередині безпечного запиту: читання apps.main - з репліки"""
+    token = db_router._replica_reads.set(True)
+    try:
+        yield
+    finally:
+        db_router._replica_reads.reset(token)
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_inside_request(self, request, model=Post):
+        """Куди маршрутизується читання model під час обробки request"""
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(model))
+            return HttpResponse()
+
+        ReplicaPinningMiddleware(view)(request)
+        return seen[0]
+
+    def test_reads_outside_request_go_to_primary(self):
+        # Команди керування та фонові потоки не повинні читати застарілі дані
+        self.assertEqual(self.router.db_for_read(Post), PRIMARY_ALIAS)
+        self.assertEqual(self.router.db_for_read(Comment), PRIMARY_ALIAS)
+
+    def test_safe_request_reads_from_replica(self):
+        self.assertEqual(self.read_inside_request(self.factory.get("/")), REPLICA_ALIAS)
+
+    def test_replica_reads_end_with_request(self):
+        self.read_inside_request(self.factory.get("/"))
+        self.assertEqual(self.router.db_for_read(Post), PRIMARY_ALIAS)
+
+    def test_unsafe_request_reads_from_primary_and_pins(self):
+        request = self.factory.post("/")
+        self.assertEqual(self.read_inside_request(request), PRIMARY_ALIAS)
+
+        response = ReplicaPinningMiddleware(lambda request: HttpResponse())(self.factory.post("/"))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_pinned_request_reads_from_primary(self):
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = str(int(time.time() + 60))
+        self.assertEqual(self.read_inside_request(request), PRIMARY_ALIAS)
+
+    def test_expired_pin_reads_from_replica(self):
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = str(int(time.time() - 60))
+        self.assertEqual(self.read_inside_request(request), REPLICA_ALIAS)
+
+    def test_other_apps_always_read_from_primary(self):
+        self.assertEqual(self.read_inside_request(self.factory.get("/"), model=User), PRIMARY_ALIAS)
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Post), PRIMARY_ALIAS)
+
+
+@override_settings(DATABASE_ROUTERS=REPLICA_ROUTERS)
+class ArchiveCommentsTests(TestCase):
+    # Лише основна БД: запит до репліки в цих тестах - помилка
+    databases = {"default"}
+
+    def setUp(self):
+        self.author = User.objects.create_user("author")
+        self.post = Post.objects.create(title="Пост", slug="post", content="...", author=self.author)
+        self.old = [Comment.objects.create(post=self.post, author=self.author, body=f"old {i}") for i in range(5)]
+        self.fresh = Comment.objects.create(post=self.post, author=self.author, body="fresh")
+        Comment.objects.filter(id__in=[comment.id for comment in self.old]).update(
+            created_at=timezone.now() - timedelta(days=400),
+        )
+
+    def test_archives_old_comments_in_batches(self):
+        call_command("archive_comments", days=365, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(list(Comment.objects.values_list("id", flat=True)), [self.fresh.id])
+        self.assertEqual(
+            sorted(ArchivedComment.objects.values_list("id", flat=True)), sorted(comment.id for comment in self.old),
+        )
+
+    def test_reads_from_primary_with_replica_routing(self):
+        # Навіть якщо читання маршрутизуються на репліку, команда читає з тієї ж БД,
+        # куди пише, і завершується після одного проходу по старих коментарях
+        with replica_reads():
+            call_command("archive_comments", days=365, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(ArchivedComment.objects.count(), len(self.old))
+
+
+@override_settings(SITE_URL="https://blog.example.com", COMMENTS_PAGE_SIZE=2)
+class CommentDigestTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user("alice", email="alice@example.com")
+        self.bob = User.objects.create_user("bob", email="bob@example.com")
+        self.reader = User.objects.create_user("reader")
+        self.alice_posts = [
+            Post.objects.create(title=f"Пост Аліси {i}", slug=f"alice-{i}", content="...", author=self.alice)
+            for i in range(2)
+        ]
+        self.bob_post = Post.objects.create(title="Пост Боба", slug="bob", content="...", author=self.bob)
+
+    def comment(self, post, author=None, body="Коментар"):
+        return Comment.objects.create(post=post, author=author or self.reader, body=body)
+
+    def send(self):
+        call_command("send_comment_digests", stdout=StringIO())
+
+    def test_own_comments_are_not_queued(self):
+        self.comment(self.bob_post, author=self.bob)
+        self.assertFalse(CommentNotification.objects.exists())
+
+    def test_one_digest_per_author_with_all_posts(self):
+        for post in self.alice_posts:
+            self.comment(post, body=f"Про {post.title}")
+        self.comment(self.bob_post)
+
+        self.send()
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ["alice@example.com", "bob@example.com"])
+        alice_digest = next(message for message in mail.outbox if message.to == ["alice@example.com"])
+        for post in self.alice_posts:
+            self.assertIn(f"Про {post.title}", alice_digest.body)
+        self.assertFalse(CommentNotification.objects.exists())
+
+    def test_sent_notifications_are_not_sent_again(self):
+        self.comment(self.bob_post)
+        self.send()
+        self.send()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_digest_stays_queued(self):
+        self.comment(self.alice_posts[0])
+        self.comment(self.bob_post)
+        send_messages = EmailBackend.send_messages
+
+        def fail_for_bob(backend, messages):
+            if messages[0].to == ["bob@example.com"]:
+                raise smtplib.SMTPRecipientsRefused({})
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, "send_messages", fail_for_bob):
+            with self.assertRaises(CommandError), self.assertLogs("apps.main.management.commands", "ERROR"):
+                self.send()
+
+        self.assertEqual([message.to for message in mail.outbox], [["alice@example.com"]])
+        self.assertEqual(list(CommentNotification.objects.values_list("recipient", flat=True)), [self.bob.id])
+
+        self.send()
+        self.assertEqual([message.to for message in mail.outbox], [["alice@example.com"], ["bob@example.com"]])
+        self.assertFalse(CommentNotification.objects.exists())
+
+    def test_link_opens_page_with_older_comment(self):
+        oldest = self.comment(self.bob_post, body="найстаріший")
+        for i in range(3):
+            self.comment(self.bob_post, body=f"новіший {i}")
+
+        self.send()
+
+        links = [line.strip() for line in mail.outbox[0].body.splitlines() if "#comment-" in line]
+        oldest_link = next(link for link in links if link.endswith(f"#comment-{oldest.id}"))
+        self.assertIn("?before=", oldest_link)
+
+        response = self.client.get(oldest_link.removeprefix("https://blog.example.com").split("#")[0])
+        self.assertIn(oldest, response.context["comments"])
+        self.assertTrue(response.context["newer_comments_hidden"])
+
+        # Найновіші коментарі вже на першій сторінці - посилання без курсора
+        self.assertTrue(any("?" not in link for link in links))
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(METRICS_DIR=self.directory, METRICS_TOKEN="secret")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.factory = RequestFactory()
+
+    def write_snapshot(self, pid, requests, age=0):
+        path = os.path.join(self.directory, f"{pid}-{time.time_ns()}.json")
+        with open(path, "w") as f:
+            json.dump({"counters": [["test_requests_total", {}, requests]], "histograms": []}, f)
+        if age:
+            os.utime(path, (time.time() - age, time.time() - age))
+        return path
+
+    def dead_pid(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        return process.pid
+
+    def total(self):
+        counters, _ = metrics.collect()
+        return counters.get(("test_requests_total", ()), 0)
+
+    def test_finished_worker_snapshots_are_retired(self):
+        dead = self.write_snapshot(self.dead_pid(), 5)
+        stale = self.write_snapshot(os.getpid(), 7, age=3600)
+        live = self.write_snapshot(os.getpid(), 11)
+
+        self.assertEqual(self.total(), 23)
+        self.assertFalse(os.path.exists(dead))
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(live))
+
+        # Лічильники лишаються монотонними, а нові знімки додаються до перенесених
+        self.write_snapshot(self.dead_pid(), 2)
+        self.assertEqual(self.total(), 25)
+        snapshots = [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        self.assertEqual(len(snapshots), 3)  # retired.json, живий воркер, поточний процес
+
+    def test_interrupted_prune_is_not_counted_twice(self):
+        dead = self.write_snapshot(self.dead_pid(), 5)
+        # Збій після запису retired.json, але до видалення перенесеного файлу
+        with mock.patch.object(metrics.Path, "unlink", side_effect=OSError):
+            self.assertEqual(self.total(), 5)
+        self.assertTrue(os.path.exists(dead))
+        self.assertEqual(self.total(), 5)
+        self.assertFalse(os.path.exists(dead))
+
+    def request(self, **extra):
+        request = self.factory.get("/metrics", **extra)
+        request.user = mock.Mock(is_staff=False)
+        return metrics.metrics_view(request)
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_proxied_clients_are_not_local(self):
+        response = self.request(REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="198.51.100.7")
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_token_grants_access(self):
+        response = self.request(
+            REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="198.51.100.7", HTTP_AUTHORIZATION="Bearer secret",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.request(HTTP_AUTHORIZATION="Bearer wrong", REMOTE_ADDR="198.51.100.7").status_code, 403)
+
+
+class CacheWarmingTests(SimpleTestCase):
+    def test_local_warming_needs_shared_cache(self):
+        with override_settings(CACHE_WARM_URL=""), self.assertRaises(CommandError):
+            call_command("warm_cache", url="", stdout=StringIO())
+
+    def prerender(self, **extra):
+        request = RequestFactory().get("/", HTTP_X_PRERENDER="1", **extra)
+        PrerenderMiddleware(lambda request: HttpResponse())(request)
+        return request.META.get("blog.prerender", False)
+
+    def test_prerender_header_from_allowed_address(self):
+        self.assertTrue(self.prerender(REMOTE_ADDR="127.0.0.1"))
+        self.assertFalse(self.prerender(REMOTE_ADDR="198.51.100.7"))
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_prerender_header_from_proxied_client(self):
+        self.assertFalse(self.prerender(REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="198.51.100.7"))
+
+
+class CommentCreateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user("reader")
+        self.post = Post.objects.create(
+            title="Пост", slug="post", content="...", author=User.objects.create_user("author"),
+        )
+        self.url = reverse("main:comment_create", args=[self.post.id])
+        self.client.force_login(self.user)
+
+    def submit(self, body, ajax=True):
+        extra = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"} if ajax else {}
+        return self.client.post(self.url, {"body": body}, **extra)
+
+    def test_invalid_form_without_js_shows_errors_inline(self):
+        response = self.submit("", ajax=False)
+        self.assertEqual(response.status_code, 400)
+        self.assertTemplateUsed(response, "main/post_details.html")
+        self.assertTrue(response.context["comment_form"].errors)
+
+    def test_invalid_form_with_js_returns_field_errors(self):
+        response = self.submit("")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("body", response.json()["errors"])
+
+    def test_duplicate_is_rejected(self):
+        self.assertEqual(self.submit("Привіт").status_code, 201)
+        self.assertEqual(self.submit("  привіт ").status_code, 409)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_duplicate_from_another_worker_is_rejected(self):
+        self.assertEqual(self.submit("Привіт").status_code, 201)
+        cache.clear()  # інший воркер: у його LocMemCache ключа немає
+        self.assertEqual(self.submit("Привіт").status_code, 409)
+
+    def test_concurrent_double_submit_creates_one_comment(self):
+        statuses = []
+        original_save = Comment.save
+
+        def save_with_concurrent_submit(comment, *args, **kwargs):
+            # Другий запит приходить, поки перший ще зберігає коментар
+            if not statuses:
+                statuses.append(self.submit("Привіт").status_code)
+            return original_save(comment, *args, **kwargs)
+
+        with mock.patch.object(Comment, "save", autospec=True, side_effect=save_with_concurrent_submit):
+            self.assertEqual(self.submit("Привіт").status_code, 201)
+        self.assertEqual(statuses, [409])
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_failed_save_does_not_block_retry(self):
+        with mock.patch.object(Comment, "save", side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            self.submit("Привіт")
+        self.assertEqual(self.submit("Привіт").status_code, 201)
+
+    def test_anonymous_redirect_encodes_next(self):
+        self.client.logout()
+        response = self.submit("Привіт", ajax=False)
+        self.assertEqual(
+            response["Location"], f"{reverse('accounts:login')}?next=/post/{self.post.id}/post",
+        )
+        self.assertEqual(self.submit("Привіт").status_code, 401)
+
+    def test_login_link_encodes_next(self):
+        self.client.logout()
+        response = self.client.get(self.post.get_absolute_url())
+        self.assertContains(response, f"?next=%2Fpost%2F{self.post.id}%2Fpost")
+
+
+class BuildSitePlanTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user("author")
+        self.posts = [
+            Post.objects.create(title=f"Пост {n}", slug=f"post-{n}", content="...", author=author)
+            for n in range(2)
+        ]
+
+    def plan(self):
+        from apps.main.management.commands.build_site import Command
+
+        return Command().plan()
+
+    def test_sort_variants_cover_sort_options(self):
+        pages = self.plan()
+        for sort in SORT_OPTIONS:
+            self.assertIn(f"/?sort={sort}", pages)
+
+    def test_counters_only_touch_pages_that_show_them(self):
+        category = Category.objects.create(name="Категорія", slug="category")
+        Post.objects.filter(pk__in=[post.pk for post in self.posts]).update(category=category)
+        post = self.posts[0]
+        author_page = reverse("main:author_posts", args=["author"])
+        feeds = [reverse("main:post_feed"), reverse("main:category_feed", args=["category"]), reverse("sitemap")]
+        stale = {
+            "views": ["/", "/?sort=popular", "/?sort=trending", author_page, post.get_absolute_url()],
+            "trending_score": ["/?sort=trending", reverse("main:post_list_by_category", args=["category"]) + "?sort=trending"],
+        }
+        fresh = {
+            "views": feeds,
+            "trending_score": [*feeds, "/", "/?sort=popular", author_page, post.get_absolute_url()],
+        }
+        for field in ("views", "trending_score"):
+            with self.subTest(field=field):
+                before = self.plan()
+                # update() без зміни updated_at, як роблять лічильники переглядів і трендів
+                Post.objects.filter(pk=post.pk).update(**{field: F(field) + 10})
+                after = self.plan()
+                for url in stale[field]:
+                    self.assertNotEqual(before[url], after[url], url)
+                for url in fresh[field]:
+                    self.assertEqual(before[url], after[url], url)
+
+    def test_edit_refreshes_feeds(self):
+        before = self.plan()
+        self.posts[0].save()
+        after = self.plan()
+        self.assertNotEqual(before[reverse("main:post_feed")], after[reverse("main:post_feed")])
+        self.assertNotEqual(before[reverse("sitemap")], after[reverse("sitemap")])
+
+
+class RelatedPostsTests(TestCase):
+    def setUp(self):
+        corpus = mock.patch.object(related, "_corpus", related.Corpus())
+        corpus.start()
+        self.addCleanup(corpus.stop)
+        self.author = User.objects.create_user("author")
+
+    def create(self, title, content):
+        slug = f"{slugify(title)}-{Post.objects.count()}"
+        return Post.objects.create(title=title, slug=slug, content=content, author=self.author)
+
+    def neighbours(self, post):
+        return list(RelatedPost.objects.filter(post=post).order_by("-score").values_list("related_id", flat=True))
+
+    def test_save_schedules_refresh_after_commit(self):
+        with mock.patch.object(related, "schedule") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                post = self.create("python django", "views models")
+        schedule.assert_called_once_with(related.refresh_post, post.pk)
+
+    def test_incremental_refresh_matches_rebuild(self):
+        posts = [
+            self.create("python django", "views models templates"),
+            self.create("python flask", "views routes templates"),
+            self.create("django orm", "models queries"),
+            self.create("rust cargo", "crates borrow"),
+        ]
+        related.rebuild_all(k=2)
+        posts[3].content = "python django models"
+        posts[3].save()
+        related.refresh_post(posts[3].pk, k=2)
+        incremental = {post.pk: set(self.neighbours(post)) for post in posts}
+        related.rebuild_all(k=2)
+        self.assertEqual(incremental, {post.pk: set(self.neighbours(post)) for post in posts})
+
+    def test_delete_refills_posts_that_lost_a_neighbour(self):
+        first = self.create("python django", "views models")
+        second = self.create("python django", "views templates")
+        third = self.create("python flask", "views routes")
+        related.rebuild_all(k=1)
+        self.assertEqual(self.neighbours(first), [second.pk])
+
+        with mock.patch.object(related, "schedule", side_effect=lambda func, *args: func(*args)):
+            with self.captureOnCommitCallbacks(execute=True):
+                second.delete()
+        self.assertEqual(self.neighbours(first), [third.pk])
+
+
+class AnalyticsRollupTests(TestCase):
+    def setUp(self):
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir, ignore_errors=True)
+        log_settings = override_settings(ANALYTICS_LOG_DIR=log_dir)
+        log_settings.enable()
+        self.addCleanup(log_settings.disable)
+        grace = mock.patch.object(analytics, "ROTATE_GRACE_SECONDS", 0)
+        grace.start()
+        self.addCleanup(grace.stop)
+        self.post = Post.objects.create(
+            title="Пост", slug="post", content="...", author=User.objects.create_user("author"),
+        )
+        self.request = RequestFactory().get("/")
+
+    def views(self):
+        return sum(PostDailyStats.objects.values_list("views", flat=True))
+
+    def test_file_left_after_commit_is_not_counted_twice(self):
+        analytics.record_post_view(self.request, self.post)
+        analytics.record_post_view(self.request, self.post)
+        with mock.patch("pathlib.Path.unlink", side_effect=OSError), self.assertRaises(OSError):
+            analytics.rollup()
+        self.assertEqual(self.views(), 2)
+
+        analytics.record_post_view(self.request, self.post)
+        self.assertEqual(analytics.rollup(), 1)
+        self.assertEqual(self.views(), 3)
+        self.assertEqual(analytics.pending_bytes(), 0)
+
+    def test_write_error_is_logged(self):
+        with mock.patch("os.write", side_effect=OSError("disk full")), \
+                self.assertLogs("apps.main.analytics", "ERROR"):
+            analytics.record_post_view(self.request, self.post)
+
+
+class StartupForkTests(SimpleTestCase):
+    @override_settings(STARTUP_WARMUP=True)
+    def test_warm_connections_are_not_inherited_by_forked_workers(self):
+        with mock.patch.object(startup, "_fork_hooks_registered", False), \
+                mock.patch.object(startup, "warmup", return_value={}), \
+                mock.patch("os.register_at_fork") as register_at_fork:
+            startup.warmup_if_enabled()
+            startup.warmup_if_enabled()
+        register_at_fork.assert_called_once_with(
+            before=startup.close_connections_before_fork,
+            after_in_child=startup.reopen_connections_after_fork,
+        )
+
+        with mock.patch.object(startup.connections, "close_all") as close_all:
+            startup.close_connections_before_fork()
+        close_all.assert_called_once_with()
+        with mock.patch.object(startup, "open_connections", side_effect=DatabaseError), \
+                self.assertLogs("apps.main.startup", "ERROR"):
+            startup.reopen_connections_after_fork()
+
+
+@override_settings(MAX_UPLOAD_SIZE=1024)
+class UploadLimitTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("author"))
+
+    def test_oversize_upload_stops_parsing_and_returns_413(self):
+        image = SimpleUploadedFile("big.png", b"x" * 512 * 1024, content_type="image/png")
+        with mock.patch.object(MaxSizeUploadHandler, "receive_data_chunk", autospec=True,
+                               side_effect=MaxSizeUploadHandler.receive_data_chunk) as receive:
+            response = self.client.post(
+                reverse("main:post_create"), {"title": "Пост", "image": image, "content": "..."},
+            )
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Post.objects.exists())
+        # Розбір обірвано на першому шматку понад ліміт, решта тіла не читалася
+        self.assertEqual(receive.call_count, 1)
+
+
+class StaticFilesStorageTests(SimpleTestCase):
+    def test_unhashed_names_without_manifest(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        storage = CompressedManifestStaticFilesStorage(location=location, base_url="/static/")
+        self.assertEqual(storage.url("css/style.css"), "/static/css/style.css")
+
+    def test_manifest_entries_stay_strict(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        storage = CompressedManifestStaticFilesStorage(location=location, base_url="/static/")
+        storage.hashed_files = {"css/style.css": "css/style.0123456789ab.css"}
+        self.assertEqual(storage.url("css/style.css"), "/static/css/style.0123456789ab.css")
+        with self.assertRaises(ValueError):
+            storage.url("css/missing.css")
+
+
+class PostViewCountTests(TestCase):
+    def test_increment_ignores_stale_replica_copy(self):
+        post = Post.objects.create(
+            title="Пост", slug="post", content="...", author=User.objects.create_user("author"), views=5,
+        )
+        stale = Post.objects.get(pk=post.pk)
+        stale.views = 0  # копія з репліки, що відстала від основної БД
+        with mock.patch("apps.main.views.get_object_or_404", return_value=stale):
+            self.client.get(post.get_absolute_url())
+        post.refresh_from_db()
+        self.assertEqual(post.views, 6)
+
+
+class ImageUploadValidationTests(SimpleTestCase):
+    def image(self, name, image_format, size):
+        buffer = BytesIO()
+        Image.new("RGB", size, "teal").save(buffer, format=image_format)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type=Image.MIME[image_format])
+
+    @override_settings(IMAGE_MAX_SIDE=100)
+    def test_truncated_image_is_a_field_error(self):
+        upload = self.image("broken.jpg", "JPEG", (400, 300))
+        upload = SimpleUploadedFile("broken.jpg", upload.read()[:2000], content_type="image/jpeg")
+        with self.assertRaisesMessage(ValidationError, "Завантажте коректне зображення."):
+            ValidatedImageField().clean(upload)
+
+    @override_settings(MAX_IMAGE_PIXELS=10_000, MAX_DECODED_PIXELS=1_000)
+    def test_lower_pixel_cap_without_draft_decoding(self):
+        validate_image_upload(self.image("photo.jpg", "JPEG", (50, 50)))
+        with self.assertRaises(ValidationError):
+            validate_image_upload(self.image("photo.png", "PNG", (50, 50)))
+
+
+class TrendingRecomputeTests(TestCase):
+    def test_only_active_or_scored_posts_are_updated(self):
+        author = User.objects.create_user("author")
+        active, cooling, idle = [
+            Post.objects.create(title=f"Пост {n}", slug=f"post-{n}", content="...", author=author)
+            for n in range(3)
+        ]
+        Post.objects.filter(pk=cooling.pk).update(trending_score=5)
+        record_activity(active.pk, views=3)
+
+        # idle (без активності й з нульовим рейтингом) не переписується
+        self.assertEqual(recompute_scores(), 2)
+
+        scores = dict(Post.objects.values_list("pk", "trending_score"))
+        self.assertGreater(scores[active.pk], 0)
+        self.assertEqual(scores[cooling.pk], 0)
+        self.assertEqual(scores[idle.pk], 0)
+
+
+class CleanupMediaTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root
+
+    def blob(self, name, age=3600):
+        path = os.path.join(self.media_root, "blobs", "ab", name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as blob:
+            blob.write(b"...")
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+        return path
+
+    def test_references_are_collected_once_per_run(self):
+        post = Post.objects.create(title="Пост", slug="post", content="...", author=User.objects.create_user("author"))
+        Post.objects.filter(pk=post.pk).update(image="blobs/ab/used.jpg")
+        used = self.blob("used.jpg")
+        orphans = [self.blob(f"orphan-{n}.jpg") for n in range(5)]
+        fresh = self.blob("fresh.jpg", age=0)
+
+        # Запитів стільки, скільки полів (два проходи), а не полів на кожен файл
+        with self.assertNumQueries(6):
+            call_command("cleanup_media", stdout=StringIO())
+
+        self.assertTrue(os.path.exists(used))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertFalse(any(os.path.exists(path) for path in orphans))
@@ -0,0 +1,94 @@
+"""
+Трендові пости.
+
+Активність (перегляди, коментарі, лайки) рахується у погодинних кошиках
+PostActivity. Періодично (команда recompute_trending) для кожного поста
+рахується зважена сума з експоненційним згасанням і записується
+в індексоване поле Post.trending_score одним UPDATE.
+"""
+from datetime import timedelta
+
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Скільки годин активності враховується
+WINDOW_HOURS = 72
+
+# За скільки годин вага активності зменшується вдвічі
+HALF_LIFE_HOURS = 12
+
+VIEW_WEIGHT = 1.0
+COMMENT_WEIGHT = 5.0
+LIKE_WEIGHT = 3.0
+
+
+def current_bucket(now=None):
+    """Початок поточної години"""
+    now = now or timezone.now()
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+def record_activity(post_id, views=0, comments=0, likes=0):
+    """Додає активність до погодинного кошика поста"""
+    from .models import PostActivity
+
+    hour = current_bucket()
+    updated = PostActivity.objects.filter(post_id=post_id, hour=hour).update(
+        views=F("views") + views,
+        comments=F("comments") + comments,
+        likes=F("likes") + likes,
+    )
+    if not updated:
+        _, created = PostActivity.objects.get_or_create(
+            post_id=post_id, hour=hour,
+            defaults={"views": views, "comments": comments, "likes": likes},
+        )
+        if not created:
+            # Кошик створив паралельний запит
+            PostActivity.objects.filter(post_id=post_id, hour=hour).update(
+                views=F("views") + views,
+                comments=F("comments") + comments,
+                likes=F("likes") + likes,
+            )
+
+
+def recompute_scores(now=None):
+    """
+    Перераховує trending_score одним UPDATE - лише для постів з активністю
+    у вікні або з ненульовим рейтингом (щоб скинути його до 0).
+
+    Вага кожного кошика залежить лише від його віку, тому вона
+    підставляється в SQL як CASE по годинах вікна.
+    """
+    from .models import Post, PostActivity
+
+    now_bucket = current_bucket(now)
+    cutoff = now_bucket - timedelta(hours=WINDOW_HOURS)
+
+    decay = Case(
+        *[
+            When(hour=now_bucket - timedelta(hours=age), then=Value(0.5 ** (age / HALF_LIFE_HOURS)))
+            for age in range(WINDOW_HOURS + 1)
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    activity = (
+        F("views") * VIEW_WEIGHT
+        + F("comments") * COMMENT_WEIGHT
+        + F("likes") * LIKE_WEIGHT
+    )
+    score = (
+        PostActivity.objects.filter(post=OuterRef("pk"), hour__gte=cutoff)
+        .values("post")
+        .annotate(score=Sum(activity * decay, output_field=FloatField()))
+        .values("score")
+    )
+    # Пости без активності у вікні й з нульовим рейтингом лишаються 0 - їх не переписуємо
+    active = PostActivity.objects.filter(hour__gte=cutoff).values("post")
+    updated = Post.objects.filter(Q(pk__in=active) | Q(trending_score__gt=0)).update(
+        trending_score=Coalesce(Subquery(score, output_field=FloatField()), Value(0.0))
+    )
+    PostActivity.objects.filter(hour__lt=cutoff).delete()
+    return updated
@@ -0,0 +1,176 @@
+"""
+Обробка завантажених зображень.
+
+MaxSizeUploadHandler стежить за розміром файлу під час потокового
+завантаження і обриває розбір запиту після MAX_UPLOAD_SIZE байт, а
+UploadLimitMiddleware відповідає на такий запит 413.
+validate_image_upload() перевіряє формат і розміри лише за заголовком
+(Pillow не декодує пікселі), а normalize_image() зменшує завеликі
+оригінали та прибирає EXIF.
+"""
+import os
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import InMemoryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import HttpResponse
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+ALLOWED_IMAGE_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+# Позначка в request.META: розбір тіла обірвано через завеликий файл
+UPLOAD_TOO_LARGE = "blog.upload_too_large"
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """
+    Має стояти першим у FILE_UPLOAD_HANDLERS. Поки файл не перевищив
+    MAX_UPLOAD_SIZE, дані передаються наступним обробникам. Після цього
+    розбір зупиняється: StopUpload(connection_reset=True) не дочитує решту
+    тіла, тож клієнт не може змусити сервер прийняти гігабайти, які все
+    одно буде відкинуто.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.MAX_UPLOAD_SIZE:
+            self.request.META[UPLOAD_TOO_LARGE] = True
+            raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class UploadLimitMiddleware:
+    """
+    Має стояти після CsrfViewMiddleware. Якщо MaxSizeUploadHandler обірвав
+    розбір, поля форми після файлу втрачено, тож view не викликається:
+    клієнт отримує 413 (якщо з'єднання ще відкрите).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method != "POST" or request.content_type != "multipart/form-data":
+            return None
+        request.POST  # розбір тіла; зазвичай CsrfViewMiddleware уже його виконав
+        if request.META.get(UPLOAD_TOO_LARGE):
+            return HttpResponse(
+                f"Файл завеликий. Максимальний розмір - {filesizeformat(settings.MAX_UPLOAD_SIZE)}.",
+                status=413, content_type="text/plain; charset=utf-8",
+            )
+        return None
+
+
+def validate_image_upload(file):
+    """Перевіряє розмір, формат і розміри зображення, читаючи лише заголовок"""
+    if not isinstance(file, UploadedFile):
+        # Вже збережений файл - перевіряти повторно не потрібно
+        return
+
+    if file.size > settings.MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            f"Файл завеликий. Максимальний розмір - {filesizeformat(settings.MAX_UPLOAD_SIZE)}."
+        )
+
+    file.seek(0)
+    try:
+        # Image.open читає лише заголовок; пікселі не декодуються
+        with Image.open(file) as image:
+            image_format = image.format
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError("Завантажте коректне зображення.")
+    finally:
+        file.seek(0)
+
+    if image_format not in ALLOWED_IMAGE_FORMATS:
+        raise ValidationError(
+            f"Непідтримуваний формат. Дозволено: {', '.join(ALLOWED_IMAGE_FORMATS)}."
+        )
+    # Лише JPEG декодується зменшеним (draft()); PNG, WebP і GIF при нормалізації
+    # розпаковуються повністю, тож для них діє нижчий ліміт MAX_DECODED_PIXELS
+    max_pixels = settings.MAX_IMAGE_PIXELS
+    if image_format != "JPEG":
+        max_pixels = min(max_pixels, settings.MAX_DECODED_PIXELS)
+    if width * height > max_pixels:
+        raise ValidationError("Зображення має занадто велику роздільну здатність.")
+
+
+def normalize_image(file, max_side=None):
+    """
+    Зменшує зображення до max_side по довшій стороні та прибирає EXIF.
+
+    Для JPEG використовується draft(): декодер одразу читає зменшену
+    версію, тож пам'ять обмежена розміром результату, а не оригіналу.
+    Інші формати декодуються повністю, і пам'ять обмежує лише
+    MAX_DECODED_PIXELS (перевіряється в validate_image_upload()).
+    Повертає новий файл або початковий, якщо змінювати нічого не потрібно.
+    Пошкоджений файл, який пройшов verify(), дає ValidationError.
+    """
+    if not isinstance(file, UploadedFile):
+        return file
+    max_side = max_side or settings.IMAGE_MAX_SIDE
+
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            image_format = image.format
+            has_exif = bool(image.info.get("exif")) or bool(image.getexif())
+            if max(image.size) <= max_side and not has_exif:
+                file.seek(0)
+                return file
+            # Анімовані GIF не перекодовуємо, щоб не втратити кадри
+            if image_format == "GIF" and getattr(image, "is_animated", False):
+                file.seek(0)
+                return file
+
+            image.draft("RGB", (max_side, max_side))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+            if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            buffer = BytesIO()
+            save_options = {"quality": 85, "optimize": True} if image_format in ("JPEG", "WEBP") else {}
+            # info не передається, тож EXIF (GPS, модель камери) не зберігається
+            image.save(buffer, format=image_format, **save_options)
+    except (OSError, Image.DecompressionBombError):
+        # Обрізаний чи пошкоджений файл, який пройшов verify(), падає лише на декодуванні
+        file.seek(0)
+        raise ValidationError("Завантажте коректне зображення.")
+
+    base = os.path.splitext(os.path.basename(file.name))[0]
+    name = f"{base}.{ALLOWED_IMAGE_FORMATS[image_format]}"
+    return InMemoryUploadedFile(
+        buffer, getattr(file, "field_name", None), name,
+        Image.MIME.get(image_format, file.content_type), buffer.getbuffer().nbytes, None,
+    )
+
+
+class ValidatedImageField(forms.ImageField):
+    """
+    ImageField, що спершу перевіряє розмір і заголовок (до повного читання
+    файлу Pillow у стандартному ImageField), а потім нормалізує зображення.
+    Використовується для Post.image і Profile.avatar.
+    """
+
+    def to_python(self, data):
+        if isinstance(data, UploadedFile):
+            validate_image_upload(data)
+        file = super().to_python(data)
+        return normalize_image(file) if file else file
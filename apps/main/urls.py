@@ -1,14 +1,22 @@
 from django.urls import path
 from . import views
+from .feeds import CategoryPostsFeed, LatestPostsFeed
 
 app_name = "main"
 
 urlpatterns = [
     path('', views.post_list, name="post_list"),
     path('category/<slug:category_slug>', views.post_list, name="post_list_by_category"),
+    path('feed/', LatestPostsFeed(), name="post_feed"),
+    path('category/<slug:category_slug>/feed/', CategoryPostsFeed(), name="category_feed"),
+    path('archive/<int:year>/<int:month>/', views.archive_month, name="archive_month"),
+    path('author/<str:username>/', views.author_posts, name="author_posts"),
+    path('search/suggest', views.search_suggest, name="search_suggest"),
     path('post/create/', views.post_create, name="post_create"),
     path('post/<int:id>/<slug:slug>', views.post_detail, name="post_detail"),
     path('post/<int:id>/<slug:slug>/edit/', views.post_update, name="post_update"),
     path('post/<int:id>/<slug:slug>/delete/', views.post_delete, name="post_delete"),
+    path('post/<int:id>/comment/', views.comment_create, name="comment_create"),
+    path('post/<int:id>/comments/', views.comment_list, name="comment_list"),
     path('comment/<int:id>/delete/', views.comment_delete, name="comment_delete"),
 ]
\ No newline at end of file
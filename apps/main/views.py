@@ -1,13 +1,39 @@
+import hashlib
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
 from django.shortcuts import render, get_object_or_404, redirect
 from .models import Post, Category, Comment
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from django.db.models import F, Q
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
+from django.db import transaction
+from django.contrib.auth.models import User
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_POST, require_safe
 from .forms import PostForm, CommentForm
+from .trending import record_activity
+from .analytics import record_post_view
+from .suggest import suggest
+from . import archive
 from django.conf import settings
 
 
+POSTS_PER_PAGE = 3
+# ?sort= -> порядок постів у списку (build_site рендерить кожен варіант)
+SORT_OPTIONS = {
+    'new': ('-created_at',),
+    'old': ('created_at',),
+    'popular': ('-views',),
+    'trending': ('-trending_score', '-created_at'),
+}
+
+
 def post_list(request, category_slug=None):
     posts = Post.objects.all()
 
@@ -29,15 +55,11 @@ def post_list(request, category_slug=None):
         )
 
     sort = request.GET.get('sort')
-    if sort == 'new':
-        posts = posts.order_by('-created_at')
-    elif sort == 'old':
-        posts = posts.order_by('created_at')
-    elif sort == 'popular':
-        posts = posts.order_by('-views')
+    if sort in SORT_OPTIONS:
+        posts = posts.order_by(*SORT_OPTIONS[sort])
 
     # Пагінація
-    paginator = Paginator(posts, 3)  # 6 постів на сторінку
+    paginator = Paginator(posts, POSTS_PER_PAGE)
     page = request.GET.get('page')
 
     try:
@@ -55,33 +77,203 @@ def post_list(request, category_slug=None):
         'search_query': search_query,
     })
 
+def _archive_list(request, posts, context):
+    """Сторінка архіву: пости від новіших курсором ?before=, без OFFSET і COUNT"""
+    before = None
+    if 'before' in request.GET:
+        try:
+            before = _parse_cursor(request.GET['before'])
+        except ValueError:
+            return redirect(request.path)
+
+    posts, has_older = archive.page(posts, before=before)
+    if before and not posts:
+        return redirect(request.path)
+    return render(request, 'main/archive.html', {
+        **context,
+        'posts': posts,
+        'is_first_page': before is None,
+        'older_url': f"{request.path}?{urlencode({'before': _cursor(posts[-1])})}" if has_older else None,
+        'archive_months': archive.months(),
+        'archive_authors': archive.authors(),
+    })
+
+
+@require_safe
+def archive_month(request, year, month):
+    try:
+        start, end = archive.month_bounds(year, month)
+    except (ValueError, OverflowError):
+        raise Http404
+    return _archive_list(request, Post.objects.filter(created_at__gte=start, created_at__lt=end), {
+        'archive_month': date(year, month, 1),
+    })
+
+
+@require_safe
+def author_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return _archive_list(request, Post.objects.filter(author=author), {
+        'archive_author': author,
+    })
+
+
+def search_suggest(request):
+    """Підказки для рядка пошуку з індексу в пам'яті (без запитів до БД)"""
+    query = request.GET.get('q', '')[:100]
+    return JsonResponse({
+        'query': query,
+        'results': suggest(query),
+    })
+
+@require_safe
 def post_detail(request, id, slug):
     post = get_object_or_404(Post, id=id, slug=slug)
-    post.views += 1
-    post.save()
+    # Попередній рендер (build_site, warm_cache) не є переглядом
+    if not request.META.get('blog.prerender'):
+        # post міг прийти з репліки (require_safe), тож інкремент робить сама БД,
+        # а не запис застарілого значення + 1
+        Post.objects.filter(pk=post.pk).update(views=F('views') + 1)
+        post.views += 1
+        record_activity(post.id, views=1)
+        record_post_view(request, post)
 
-    comments = post.comments.all()
-    comment_form = CommentForm()
+    # ?before= - сторінка коментарів, починаючи з конкретного (посилання з дайджесту)
+    before = None
+    if 'before' in request.GET:
+        try:
+            before = _parse_cursor(request.GET['before'])
+        except ValueError:
+            pass
+    return _render_post_detail(request, post, CommentForm(), before=before)
 
 
-    if request.method == 'POST':
-        if not request.user.is_authenticated:
-            return redirect(f'{settings.LOGIN_URL}?next={request.path}')
-        
-        comment_form = CommentForm(request.POST)
-        if comment_form.is_valid():
-            comment = comment_form.save(commit=False)
-            comment.post = post
-            comment.author = request.user
-            comment.save()
-            return redirect(post.get_absolute_url())
-
+def _render_post_detail(request, post, comment_form, before=None, status=200):
+    comments, has_older = Comment.objects.page_for_post(post, before=before)
     return render(request, 'main/post_details.html', {
         'post': post, 
         'comments': comments,
+        'comments_count': Comment.objects.count_for_post(post),
+        'older_comments_url': _older_comments_url(post, comments) if has_older else None,
+        'newer_comments_hidden': before is not None,
         'comment_form': comment_form,
+    }, status=status)
+
+
+def _cursor(obj):
+    """Курсор keyset-пагінації: дата створення та id останнього показаного об'єкта"""
+    return f'{obj.created_at.isoformat()}_{obj.id}'
+
+
+def _parse_cursor(value):
+    """Зворотне до _cursor(); ValueError, якщо курсор некоректний"""
+    created_at, obj_id = value.rsplit('_', 1)
+    return datetime.fromisoformat(created_at), int(obj_id)
+
+
+def comment_url(comment, newest_ids):
+    """
+    Постійне посилання на коментар. Якщо його немає серед newest_ids (першої
+    сторінки коментарів поста), сторінка відкривається з курсором, з якого
+    список коментарів починається саме з цього коментаря.
+    """
+    url = comment.post.get_absolute_url()
+    if comment.id not in newest_ids:
+        query = urlencode({'before': f'{comment.created_at.isoformat()}_{comment.id + 1}'})
+        url = f'{url}?{query}'
+    return f'{url}#comment-{comment.id}'
+
+
+def _older_comments_url(post, comments):
+    query = urlencode({'before': _cursor(comments[-1])})
+    return f"{reverse('main:comment_list', args=[post.id])}?{query}"
+
+
+@require_safe
+def comment_list(request, id):
+    """Старіші коментарі (кнопка «Завантажити старіші»), з архіву - прозоро"""
+    post = get_object_or_404(Post.objects.only('id'), id=id)
+    try:
+        before = _parse_cursor(request.GET['before'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Некоректний курсор'}, status=400)
+
+    comments, has_older = Comment.objects.page_for_post(post, before=before)
+    html = ''.join(
+        render_to_string('main/components/comment.html', {'comment': comment}, request=request)
+        for comment in comments
+    )
+    return JsonResponse({
+        'html': html,
+        'next': _older_comments_url(post, comments) if has_older else None,
     })
 
+
+def _is_ajax(request):
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+def _comment_digest(body):
+    return hashlib.sha256(' '.join(body.split()).lower().encode()).hexdigest()
+
+
+def _recent_duplicate(user, post, digest):
+    """Чи надсилав користувач такий самий коментар до поста протягом COMMENT_DUPLICATE_WINDOW"""
+    since = timezone.now() - timedelta(seconds=settings.COMMENT_DUPLICATE_WINDOW)
+    recent = Comment.objects.filter(post=post, author=user, created_at__gte=since).values_list('body', flat=True)
+    return any(_comment_digest(body) == digest for body in recent)
+
+
+@require_POST
+def comment_create(request, id):
+    """
+    Додавання коментаря окремим запитом: без лічильника переглядів і
+    повного рендеру сторінки. Для fetch-запиту повертає HTML нового
+    коментаря, для звичайної форми - редирект до нього.
+    """
+    post = get_object_or_404(Post.objects.only('id', 'slug'), id=id)
+    if not request.user.is_authenticated:
+        if _is_ajax(request):
+            return JsonResponse({'error': 'Потрібно увійти'}, status=401)
+        return redirect_to_login(post.get_absolute_url())
+
+    form = CommentForm(request.POST)
+    if not form.is_valid():
+        if _is_ajax(request):
+            return JsonResponse({'errors': form.errors}, status=400)
+        # Без JS - та сама сторінка поста з помилками під полем форми
+        return _render_post_detail(request, get_object_or_404(Post, id=id), form, status=400)
+
+    # Повторне натискання або той самий текст протягом короткого вікна не створює дубль.
+    # cache.add() атомарно резервує ключ до збереження, тож із двох одночасних
+    # запитів проходить лише один; перевірка в БД ловить повтори з інших воркерів
+    body = form.cleaned_data['body']
+    digest = _comment_digest(body)
+    dedupe_key = f'comment_dedupe:{request.user.id}:{post.id}:{digest}'
+    if not cache.add(dedupe_key, 1, timeout=settings.COMMENT_DUPLICATE_WINDOW) or \
+            _recent_duplicate(request.user, post, digest):
+        if _is_ajax(request):
+            return JsonResponse({'error': 'Такий коментар щойно надіслано'}, status=409)
+        return redirect(post.get_absolute_url())
+
+    try:
+        # Інвалідації кешів від сигналів (bump_on_commit) об'єднуються в один запис після коміту
+        with transaction.atomic():
+            comment = form.save(commit=False)
+            comment.post = post
+            comment.author = request.user
+            comment.save()
+    except Exception:
+        # Невдала спроба не блокує повтор
+        cache.delete(dedupe_key)
+        raise
+
+    if _is_ajax(request):
+        html = render_to_string('main/components/comment.html', {'comment': comment}, request=request)
+        return HttpResponse(html, status=201)
+    return redirect(f'{post.get_absolute_url()}#comment-{comment.id}')
+
+
 @login_required
 def post_create(request):
     if request.method == 'POST':
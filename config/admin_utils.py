@@ -0,0 +1,89 @@
+"""
+Допоміжні класи для адмінки з великими таблицями.
+
+EstimatedCountPaginator не робить точний COUNT(*) по всій таблиці:
+точна кількість рахується лише до ADMIN_EXACT_COUNT_LIMIT рядків, далі
+для нефільтрованого списку береться оцінка (reltuples у PostgreSQL,
+MAX(pk) в інших БД). QueryBudgetMixin рахує SQL-запити сторінки списку
+і пише попередження, якщо їх більше за query_budget.
+"""
+import logging
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+from config import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_row_count(model, using):
+    """Приблизна кількість рядків у таблиці без повного сканування"""
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    if model._meta.pk.get_internal_type() in ("AutoField", "BigAutoField", "SmallAutoField"):
+        # Пошук максимуму за первинним ключем - один прохід по індексу
+        return model._default_manager.using(using).aggregate(max_pk=Max("pk"))["max_pk"] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        # COUNT по підзапиту з LIMIT: сканується не більше limit + 1 рядків
+        exact = queryset.order_by()[:limit + 1].count()
+        if exact <= limit:
+            return exact
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate and estimate > limit:
+                return estimate
+        # Фільтрований великий список: сторінки після limit доступні лише через пошук/фільтри
+        return limit
+
+
+class QueryBudgetMixin:
+    """
+    Для ModelAdmin: стежить, щоб сторінка списку не робила більше
+    query_budget SQL-запитів (N+1 через __str__, забутий select_related).
+    """
+
+    query_budget = 10
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def changelist_view(self, request, extra_context=None):
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        wrappers = [connection.execute_wrapper(count_queries) for connection in connections.all()]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        try:
+            response = super().changelist_view(request, extra_context)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+
+        if queries[0] > self.query_budget:
+            metrics.inc("admin_query_budget_exceeded_total", model=self.opts.label)
+            logger.warning(
+                "Сторінка списку %s: %d SQL-запитів при бюджеті %d",
+                self.opts.label, queries[0], self.query_budget,
+            )
+        return response
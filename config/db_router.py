@@ -0,0 +1,74 @@
+"""
+Маршрутизація читання на репліку БД.
+
+Читання моделей застосунку main (пости, категорії, коментарі) йде на
+аліас 'replica' лише всередині безпечних HTTP-запитів (ReplicaPinningMiddleware),
+усі записи - на 'default'. Команди керування, фонові потоки й усе інше
+поза обробкою запиту читають з основної БД: вони зазвичай читають, щоб
+потім записати, і застаріла репліка дала б їм неправильні дані.
+
+Після POST-запиту браузер отримує cookie, і протягом REPLICA_PIN_SECONDS
+його запити читають з основної БД, щоб користувач одразу бачив власні зміни.
+"""
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_ALIAS = "replica"
+PRIMARY_ALIAS = "default"
+PIN_COOKIE = "use_primary"
+
+REPLICA_APPS = {"main"}
+
+# За замовчуванням репліка вимкнена; її вмикає лише middleware на час запиту
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in REPLICA_APPS and _replica_reads.get():
+            return REPLICA_ALIAS
+        return PRIMARY_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Репліка - копія основної БД, тож зв'язки між ними допустимі
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Репліка отримує схему разом з даними від команди sync_replica
+        return db == PRIMARY_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Дозволяє читання з репліки на час безпечного запиту. Запити, що змінюють
+    дані, і запити короткий час після них читають з основної БД.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = request.method not in ("GET", "HEAD", "OPTIONS")
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+
+        token = _replica_reads.set(not (writes or pinned_until > time.time()))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+
+        if writes:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time() + seconds)),
+                max_age=seconds, httponly=True, samesite="Lax",
+            )
+        return response
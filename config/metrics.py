@@ -0,0 +1,332 @@
+"""
+Метрики у форматі Prometheus.
+
+Кожен процес рахує метрики у власному реєстрі в пам'яті (під одним
+неконкурентним локом) і раз на METRICS_FLUSH_INTERVAL секунд скидає
+знімок у файл METRICS_DIR/<pid>-<start>.json; свіжий mtime файлу
+означає, що воркер живий. Ендпоінт /metrics підсумовує знімки всіх
+воркерів вузла.
+
+Знімки завершених воркерів (процесу вже немає або файл не оновлювався
+METRICS_STALE_AFTER секунд) під час збору переносяться до retired.json:
+лічильники лишаються монотонними, а кількість файлів - обмеженою.
+"""
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+try:
+    import fcntl
+except ImportError:  # Windows: без блокування два паралельні збори можуть перенести знімок двічі
+    fcntl = None
+
+PREFIX = "blog_"
+RETIRED_FILE = "retired.json"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "http_requests_total": ("counter", "Кількість HTTP-запитів"),
+    "http_request_duration_seconds": ("histogram", "Тривалість обробки запиту"),
+    "db_queries_total": ("counter", "Кількість SQL-запитів"),
+    "db_query_duration_seconds_total": ("counter", "Сумарний час SQL-запитів"),
+    "cache_requests_total": ("counter", "Звернення до кешів застосунку (hit/miss)"),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.gauges = {}
+        self.reset()
+
+    def reset(self):
+        """Порожній реєстр з власним файлом знімка (також у дочірньому процесі після fork)"""
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = 0.0
+        self.flushed = False
+        self.heartbeat = None
+        self.file_name = f"{os.getpid()}-{time.time_ns()}.json"
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram[0][index] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def register_gauge(self, name, help_text, callback):
+        """Датчик, значення якого обчислюється під час збору метрик"""
+        self.gauges[name] = (help_text, callback)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": [[name, dict(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [
+                    [name, dict(labels), list(buckets), total, count]
+                    for (name, labels), (buckets, total, count) in self.histograms.items()
+                ],
+            }
+
+    def maybe_flush(self):
+        if self.heartbeat is None:
+            # Фоновий потік оновлює знімок і без запитів: за mtime збір відрізняє живі воркери
+            self.heartbeat = threading.Thread(target=self._heartbeat, name="metrics-flush", daemon=True)
+            self.heartbeat.start()
+        if time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        directory = Path(settings.METRICS_DIR)
+        path = directory / self.file_name
+        if self.flushed and not path.exists():
+            # Воркер довго не оновлював знімок, і його вже перенесено до retired.json;
+            # починаємо з нуля, щоб не врахувати ті самі значення двічі
+            with self.lock:
+                self.counters.clear()
+                self.histograms.clear()
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = directory / f".{self.file_name}.tmp"
+            tmp_path.write_text(json.dumps(self.snapshot()))
+            os.replace(tmp_path, path)
+            self.flushed = True
+        except OSError:
+            pass
+
+
+registry = Registry()
+atexit.register(registry.flush)
+# gunicorn --preload: воркер не повинен писати у файл знімка майстра
+os.register_at_fork(after_in_child=registry.reset)
+
+
+def inc(name, value=1, **labels):
+    registry.inc(name, value, **labels)
+
+
+def cache_result(cache_name, hits=0, misses=0):
+    if hits:
+        registry.inc("cache_requests_total", hits, cache=cache_name, result="hit")
+    if misses:
+        registry.inc("cache_requests_total", misses, cache=cache_name, result="miss")
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(counters, histograms, data):
+    for name, labels, value in data["counters"]:
+        key = (name, _labels_key(labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, buckets, total, count in data["histograms"]:
+        key = (name, _labels_key(labels))
+        merged = histograms.setdefault(key, [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+        merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+        merged[1] += total
+        merged[2] += count
+
+
+def _as_snapshot(counters, histograms):
+    return {
+        "counters": [[name, dict(labels), value] for (name, labels), value in counters.items()],
+        "histograms": [
+            [name, dict(labels), buckets, total, count]
+            for (name, labels), (buckets, total, count) in histograms.items()
+        ],
+    }
+
+
+def _snapshot_paths(directory):
+    return [path for path in directory.glob("*-*.json") if path.name != RETIRED_FILE]
+
+
+def _is_retired(path, now):
+    """Знімок завершеного воркера: процесу немає або файл давно не оновлювався"""
+    try:
+        pid = int(path.name.split("-", 1)[0])
+        stale = now - path.stat().st_mtime > settings.METRICS_STALE_AFTER
+    except (ValueError, OSError):
+        return False
+    if stale:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def prune(directory):
+    """
+    Переносить знімки завершених воркерів до retired.json (під локом
+    collect()). Імена перенесених файлів записуються в retired.json разом
+    з їхніми значеннями, тож збій між записом і видаленням файлів не дасть
+    врахувати їх двічі.
+    """
+    retired_path = directory / RETIRED_FILE
+    retired = _read(retired_path) or {"counters": [], "histograms": [], "sources": []}
+    sources = {name for name in retired["sources"] if (directory / name).exists()}
+
+    now = time.time()
+    finished = [
+        path for path in _snapshot_paths(directory)
+        if path.name != registry.file_name and path.name not in sources and _is_retired(path, now)
+    ]
+    if finished or sources != set(retired["sources"]):
+        counters, histograms = {}, {}
+        _merge(counters, histograms, retired)
+        for path in finished:
+            data = _read(path)
+            if data:
+                _merge(counters, histograms, data)
+        sources |= {path.name for path in finished}
+        tmp_path = directory / f".{RETIRED_FILE}.tmp"
+        tmp_path.write_text(json.dumps({**_as_snapshot(counters, histograms), "sources": sorted(sources)}))
+        os.replace(tmp_path, retired_path)
+
+    for name in sources:
+        try:
+            (directory / name).unlink()
+        except OSError:
+            pass
+
+
+def collect():
+    """Підсумовує знімки всіх процесів і вже перенесені значення завершених"""
+    registry.flush()
+    directory = Path(settings.METRICS_DIR)
+    counters, histograms = {}, {}
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        lock_file = open(directory / ".retired.lock", "a")
+    except OSError:
+        return counters, histograms
+
+    # Перенесення і читання під одним локом: паралельний збір не побачить
+    # знімок, який уже видалено, а в retired.json ще не записано
+    with lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            prune(directory)
+        except OSError:
+            pass
+
+        retired = _read(directory / RETIRED_FILE)
+        skip = set()
+        if retired:
+            _merge(counters, histograms, retired)
+            skip = set(retired.get("sources", ()))
+        for path in _snapshot_paths(directory):
+            if path.name in skip:
+                continue
+            data = _read(path)
+            if data:
+                _merge(counters, histograms, data)
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+def render():
+    counters, histograms = collect()
+    lines = []
+
+    def header(name):
+        kind, help_text = HELP.get(name, ("counter", name))
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+    for name in sorted({name for name, _ in counters}):
+        header(name)
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+
+    for name in sorted({name for name, _ in histograms}):
+        header(name)
+        for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, le='+Inf')} {count}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {count}")
+
+    for name, (help_text, callback) in sorted(registry.gauges.items()):
+        try:
+            value = callback()
+        except Exception:
+            continue
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} gauge")
+        lines.append(f"{PREFIX}{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _has_token(request):
+    token = settings.METRICS_TOKEN
+    return bool(token) and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
+def metrics_view(request):
+    """
+    Метрики доступні персоналу, з токеном (Authorization: Bearer METRICS_TOKEN)
+    або з дозволених адрес; адреса клієнта визначається з урахуванням довірених проксі.
+    """
+    from config.middleware import client_ip
+
+    if not (request.user.is_staff or _has_token(request) or client_ip(request) in settings.METRICS_ALLOWED_IPS):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,5 +1,30 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
 from django.shortcuts import redirect
 
+from config import metrics
+
+
+def client_ip(request):
+    """
+    Адреса клієнта з урахуванням довірених проксі. Кожен проксі дописує
+    в X-Forwarded-For адресу, від якої отримав запит, тож за
+    TRUSTED_PROXY_COUNT проксі адреса клієнта - TRUSTED_PROXY_COUNT-й
+    елемент з кінця; все лівіше клієнт міг підробити. Без довірених
+    проксі (або якщо запит прийшов повз них) - REMOTE_ADDR.
+    """
+    remote_addr = request.META.get("REMOTE_ADDR", "")
+    depth = settings.TRUSTED_PROXY_COUNT
+    if depth:
+        forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+        if len(forwarded) >= depth:
+            return forwarded[-depth]
+    return remote_addr
+
+
 class AdminAccessRedirectMiddleware:
     def __init__(self, get_response): 
         self.get_response = get_response
@@ -9,4 +34,63 @@ class AdminAccessRedirectMiddleware:
             user = request.user
             if not user.is_authenticated or not user.is_staff:
                 return redirect('main:post_list')
-        return self.get_response(request)
\ No newline at end of file
+        return self.get_response(request)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZip-стиснення лише для текстових типів (COMPRESSION_CONTENT_TYPES)
+    і відповідей, не менших за COMPRESSION_MIN_SIZE байт.
+
+    Зображення та вже стиснуті відповіді (Content-Encoding) пропускаються,
+    потокові відповіді стискаються на льоту. У MIDDLEWARE має стояти після
+    UpdateCacheMiddleware, тоді в кеш потрапляють уже стиснуті байти
+    (окремо для кожного Accept-Encoding завдяки Vary).
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        return super().process_response(request, response)
+
+
+class MetricsMiddleware:
+    """Збирає тривалість запитів та кількість/час SQL-запитів за іменем URL"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0, 0.0]
+
+        def count_queries(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries[0] += 1
+                queries[1] += time.perf_counter() - started
+
+        wrappers = [connection.execute_wrapper(count_queries) for connection in connections.all()]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        metrics.registry.observe("http_request_duration_seconds", elapsed, view=view)
+        metrics.inc("http_requests_total", view=view, method=request.method, status=f"{response.status_code // 100}xx")
+        if queries[0]:
+            metrics.inc("db_queries_total", queries[0], view=view)
+            metrics.inc("db_query_duration_seconds_total", queries[1], view=view)
+        metrics.registry.maybe_flush()
+        return response
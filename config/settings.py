@@ -4,7 +4,7 @@ Django settings for config project.
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -19,7 +19,14 @@ SECRET_KEY = config('SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', default=False, cast=bool)
 
-ALLOWED_HOSTS = []
+# Порожній список з DEBUG=False відхиляє всі запити; задається через оточення
+# (наприклад, loadtest передає його запущеному runserver)
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=Csv())
+
+# Скільки зворотних проксі (nginx, балансувальник) стоїть перед застосунком. Адреса
+# клієнта для лімітів і списків дозволених адрес береться з X-Forwarded-For на цій
+# глибині (config.middleware.client_ip); 0 - застосунок приймає з'єднання напряму
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
 
 
 # Application definition
@@ -31,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
     'apps.main',
     "apps.cart",
     "apps.accounts",
@@ -38,16 +46,47 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'apps.main.invalidation.InvalidationMiddleware',
+    'apps.main.cache_warmer.PrerenderMiddleware',
+    'config.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'apps.main.uploads.UploadLimitMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'config.middleware.AdminAccessRedirectMiddleware',
 ]
 
+# Кеш відповідей (0 - вимкнено). Кешуються вже стиснуті відповіді, тому стиснення
+# не повторюється на кожен запит. Увага: перегляди з кешу не рахуються в Post.views.
+CACHE_MIDDLEWARE_SECONDS = config('RESPONSE_CACHE_SECONDS', default=0, cast=int)
+if CACHE_MIDDLEWARE_SECONDS:
+    MIDDLEWARE = [
+        'django.middleware.cache.UpdateCacheMiddleware',
+        *MIDDLEWARE,
+        'django.middleware.cache.FetchFromCacheMiddleware',
+    ]
+
+# Стиснення відповідей (config.middleware.CompressionMiddleware)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_CONTENT_TYPES = (
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/xml',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'application/rss+xml',
+    'application/atom+xml',
+    'image/svg+xml',
+)
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -75,13 +114,64 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Постійні з'єднання: воркер не відкриває нове з'єднання на кожен запит
+        'CONN_MAX_AGE': config('CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Репліка для читання (наприклад, BASE_DIR / 'db_replica.sqlite3'). Читання apps.main
+# йде на репліку, записи - в default (див. config/db_router.py). Для SQLite репліка
+# синхронізується командою `manage.py sync_replica`.
+DATABASE_REPLICA_NAME = config('DATABASE_REPLICA_NAME', default='')
+if DATABASE_REPLICA_NAME:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': DATABASE_REPLICA_NAME,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+    MIDDLEWARE.insert(MIDDLEWARE.index('config.middleware.CompressionMiddleware') + 1, 'config.db_router.ReplicaPinningMiddleware')
+
+# Скільки секунд після POST читати з основної БД (read-your-writes)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
+# Прогрів воркера при старті (див. apps/main/startup.py)
+STARTUP_WARMUP = config('STARTUP_WARMUP', default=True, cast=bool)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Хешування паролів: PBKDF2 з налаштовуваною кількістю ітерацій (apps/accounts/hashers.py).
+# Вартість однієї перевірки пароля показує `manage.py auth_benchmark`
+PASSWORD_HASHERS = [
+    'apps.accounts.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# 1 000 000 - типове значення Django 5.2; менше значення дешевше для CPU, але слабше проти офлайн-підбору
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=1_000_000, cast=int)
+
+# Обмеження спроб входу/реєстрації (apps/accounts/throttling.py): (ліміт, вікно в секундах).
+# 'username' - невдалі входи з одним ім'ям з однієї адреси; облікового запису в цілому
+# ліміт не блокує, тож чужі невдалі спроби не заважають власнику увійти
+AUTH_THROTTLE_RULES = {
+    'login': {
+        'ip': (config('LOGIN_IP_LIMIT', default=20, cast=int), 300),
+        'username': (config('LOGIN_USERNAME_LIMIT', default=5, cast=int), 300),
+    },
+    'register': {
+        'ip': (config('REGISTER_IP_LIMIT', default=5, cast=int), 3600),
+    },
+}
+# Перше блокування триває AUTH_LOCKOUT_BASE секунд, кожне наступне - вдвічі довше
+AUTH_LOCKOUT_BASE = config('AUTH_LOCKOUT_BASE', default=60, cast=int)
+AUTH_LOCKOUT_MAX = config('AUTH_LOCKOUT_MAX', default=24 * 3600, cast=int)
+AUTH_LOCKOUT_STRIKE_TTL = 24 * 3600
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -98,6 +188,23 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Сесії та автентифікація
+# SESSION_PROFILE: 'db' - сесії лише в БД, 'cached_db' - кеш + БД (за замовчуванням),
+# 'signed_cookies' - сесії в підписаних cookie без звернень до БД
+SESSION_PROFILE = config('SESSION_PROFILE', default='cached_db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_PROFILE]
+
+AUTHENTICATION_BACKENDS = [
+    'apps.accounts.backends.CachedModelBackend',
+]
+# Скільки секунд користувач зберігається в кеші процесу (0 - вимкнути кеш)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=30, cast=int)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -114,10 +221,90 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Хешовані імена + .gz/.br копії при collectstatic (див. config/staticfiles.py)
+STORAGES = {
+    # Медіафайли зберігаються за хешем вмісту, дублікати не записуються (apps/main/storage.py)
+    'default': {
+        'BACKEND': 'apps.main.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'config.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Завантаження зображень (apps/main/uploads.py): жорсткий ліміт розміру під час
+# потокового запису на диск, ліміт пікселів (захист від decompression bomb)
+# і максимальна сторона, до якої зменшуються оригінали
+FILE_UPLOAD_HANDLERS = [
+    'apps.main.uploads.MaxSizeUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+MAX_UPLOAD_SIZE = config('MAX_UPLOAD_SIZE', default=10 * 1024 * 1024, cast=int)
+MAX_IMAGE_PIXELS = config('MAX_IMAGE_PIXELS', default=25_000_000, cast=int)
+# PNG, WebP і GIF декодуються повністю (~4 байти на піксель), JPEG - зменшеним
+MAX_DECODED_PIXELS = config('MAX_DECODED_PIXELS', default=16_000_000, cast=int)
+IMAGE_MAX_SIDE = config('IMAGE_MAX_SIDE', default=2000, cast=int)
+
+# Скільки секунд зберігати картки постів у кеші фрагментів
+# (картка оновлюється одразу після редагування поста; таймаут лише освіжає лічильник переглядів)
+POST_CARD_CACHE_TIMEOUT = config('POST_CARD_CACHE_TIMEOUT', default=300, cast=int)
+
+# Аналітика: append-only лог подій переглядів (див. apps/main/analytics.py)
+ANALYTICS_LOG_DIR = config('ANALYTICS_LOG_DIR', default=str(BASE_DIR / 'var' / 'analytics'))
+
+# Скільки секунд однаковий коментар того ж користувача вважається повторним надсиланням
+COMMENT_DUPLICATE_WINDOW = config('COMMENT_DUPLICATE_WINDOW', default=30, cast=int)
+
+# Коментарі на сторінці поста і архівування старих (apps/main/management/commands/archive_comments.py)
+COMMENTS_PAGE_SIZE = config('COMMENTS_PAGE_SIZE', default=20, cast=int)
+COMMENT_ARCHIVE_AFTER_DAYS = config('COMMENT_ARCHIVE_AFTER_DAYS', default=365, cast=int)
+
+# Дайджести нових коментарів для авторів постів (команда send_comment_digests)
+COMMENT_DIGEST_MAX_COMMENTS = config('COMMENT_DIGEST_MAX_COMMENTS', default=20, cast=int)
+COMMENT_DIGEST_BATCH_SIZE = config('COMMENT_DIGEST_BATCH_SIZE', default=100, cast=int)
+# Адреса сайту для посилань у листах, які надсилаються поза запитом
+SITE_URL = config('SITE_URL', default='http://localhost:8000')
+
+# Скільки постів на сторінці архіву за місяць чи автором (apps/main/archive.py)
+ARCHIVE_PAGE_SIZE = config('ARCHIVE_PAGE_SIZE', default=12, cast=int)
+
+# Список для читання (apps.cart) зберігається в сесії як {post_id: кількість}
+CART_SESSION_ID = 'cart'
+CART_MAX_ITEMS = config('CART_MAX_ITEMS', default=100, cast=int)
+CART_MAX_QUANTITY = 99
+
+# Адмінка: до скількох рядків кількість у списках рахується точно (config/admin_utils.py)
+ADMIN_EXACT_COUNT_LIMIT = config('ADMIN_EXACT_COUNT_LIMIT', default=10000, cast=int)
+
+# Прогрів кешів популярних сторінок (apps/main/cache_warmer.py, команда warm_cache)
+CACHE_WARM_TOP_POSTS = config('CACHE_WARM_TOP_POSTS', default=20, cast=int)
+CACHE_WARM_LIST_PAGES = config('CACHE_WARM_LIST_PAGES', default=3, cast=int)
+CACHE_WARM_WORKERS = config('CACHE_WARM_WORKERS', default=4, cast=int)
+CACHE_WARM_ON_PUBLISH = config('CACHE_WARM_ON_PUBLISH', default=True, cast=bool)
+# Адреса запущеного сайту, наприклад http://127.0.0.1:8000; без неї прогрів після публікації вимкнено
+CACHE_WARM_URL = config('CACHE_WARM_URL', default='')
+# Звідки приймається заголовок X-Prerender (запити прогріву не рахуються як перегляди)
+PRERENDER_ALLOWED_IPS = config('PRERENDER_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv())
+
+# Спільний для всіх воркерів файл лічильників поколінь кешів (apps/main/invalidation.py)
+INVALIDATION_FILE = config('INVALIDATION_FILE', default=str(BASE_DIR / 'var' / 'invalidation.json'))
+
+# Метрики Prometheus (/metrics): знімки воркерів у спільному каталозі
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'var' / 'metrics'))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=1.0, cast=float)
+# Знімок воркера, не оновлений стільки секунд, вважається знімком завершеного процесу
+METRICS_STALE_AFTER = config('METRICS_STALE_AFTER', default=60, cast=float)
+# Доступ до /metrics: персонал, токен (Authorization: Bearer ...) або адреси клієнтів
+# з METRICS_ALLOWED_IPS (за проксі - див. TRUSTED_PROXY_COUNT)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv())
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -130,7 +317,7 @@ LOGOUT_REDIRECT_URL = 'main:post_list'
 # Email налаштування
 # Для розробки - виводить email у консоль (змініть на smtp.EmailBackend для продакшну)
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
 EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
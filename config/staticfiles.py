@@ -0,0 +1,116 @@
+"""
+Статичні файли: хешовані імена + попередньо стиснуті копії.
+
+collectstatic з CompressedManifestStaticFilesStorage створює для кожного
+текстового файлу style.<hash>.css, а поруч style.<hash>.css.gz
+(і .br, якщо встановлено пакет brotli). serve_static() віддає стиснуту
+копію за заголовком Accept-Encoding і дозволяє браузеру кешувати
+хешовані файли назавжди - повторний візит не завантажує CSS взагалі.
+"""
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".txt", ".html", ".json", ".xml", ".map")
+MIN_COMPRESS_SIZE = 256
+
+# style.1a2b3c4d5e6f.css - ім'я, яке створює ManifestStaticFilesStorage
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage, який після обробки створює .gz/.br копії.
+
+    Поки collectstatic не запускали (розробка, тести), маніфесту немає, і
+    шаблони отримують звичайні імена файлів замість ValueError. Якщо
+    маніфест є, відсутній у ньому файл і далі є помилкою.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                for compressed in self.compress(name):
+                    yield name, compressed, True
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+
+        variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data, quality=11)))
+
+        for suffix, compressed in variants:
+            # Стиснута копія, більша за оригінал, не має сенсу
+            if len(compressed) < len(data):
+                with open(path + suffix, "wb") as f:
+                    f.write(compressed)
+                yield name + suffix
+
+
+def serve_static(request, path):
+    """Віддає файл з STATIC_ROOT, обираючи попередньо стиснуту копію"""
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    stat = os.stat(full_path)
+    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    accept_encoding = request.headers.get("Accept-Encoding", "")
+    chosen_path, encoding = full_path, None
+    for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if candidate in accept_encoding and os.path.isfile(full_path + suffix):
+            chosen_path, encoding = full_path + suffix, candidate
+            break
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    response = FileResponse(
+        open(chosen_path, "rb"),
+        content_type=content_type or "application/octet-stream",
+        filename=os.path.basename(full_path),
+    )
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if HASHED_NAME_RE.search(full_path):
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response["Cache-Control"] = DEFAULT_CACHE_CONTROL
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
@@ -1,16 +1,30 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from django.contrib.sitemaps.views import sitemap
+
+from apps.main.sitemaps import sitemaps
+
+from config.metrics import metrics_view
+from config.staticfiles import serve_static
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='sitemap'),
     path("accounts/", include("apps.accounts.urls", namespace="accounts")),
     path('contact/', include('apps.contact.urls', namespace='contact')),
+    path('cart/', include('apps.cart.urls', namespace='cart')),
     path("", include("apps.main.urls", namespace="main"))
 ]
 
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+else:
+    # Хешовані статичні файли зі стиснутими копіями та довготривалим кешуванням
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), serve_static),
+    ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Прогрів шаблонів, URL-резолвера та з'єднань з БД до першого запиту
+from apps.main.startup import warmup_if_enabled  # noqa: E402
+
+warmup_if_enabled()